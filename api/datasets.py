@@ -12,7 +12,16 @@ import pandas as pd
 from flask import abort, g, jsonify, request
 
 from ml.describe import describe as Describe
-from ml.import_data import import_csv
+from ml.import_data import cache_csv, import_csv
+
+# Define the maximum number of rows of a training set (0 disables the limit)
+MAX_TRAINING_ROWS = int(os.getenv('MAX_TRAINING_ROWS', 10000))
+
+# Define the maximum number of features of a training set (0 disables the limit)
+MAX_TRAINING_FEATURES = int(os.getenv('MAX_TRAINING_FEATURES', 2000))
+
+# Define the maximum number of rows of a test set (0 disables the limit)
+MAX_TEST_ROWS = int(os.getenv('MAX_TEST_ROWS', 100000))
 
 def get():
     """Get all the datasets for a given user ID"""
@@ -130,8 +139,13 @@ def describe(datasetid):
 def process_files(folder, label_column):
     """Cleans CSV headers and generates dataset metadata"""
 
-    features = clean_csv_headers(folder + '/train.csv', label_column)
-    clean_csv_headers(folder + '/test.csv', label_column)
+    train_csv = clean_csv_headers(folder + '/train.csv')
+    test_csv = clean_csv_headers(folder + '/test.csv')
+    features = train_csv.columns.drop(label_column).tolist()
+
+    # Clean the data once, later imports load the cache
+    cache_csv(folder + '/train.csv', label_column, train_csv)
+    cache_csv(folder + '/test.csv', label_column, test_csv)
 
     train = import_csv(folder + '/train.csv', label_column)[0]
     test = import_csv(folder + '/test.csv', label_column)[0]
@@ -139,13 +153,13 @@ def process_files(folder, label_column):
     if train.shape[0] < 50:
         raise ValueError('training_rows_insufficient')
 
-    if train.shape[0] > 10000:
+    if MAX_TRAINING_ROWS and train.shape[0] > MAX_TRAINING_ROWS:
         raise ValueError('training_rows_excess')
 
-    if train.shape[1] > 2000:
+    if MAX_TRAINING_FEATURES and train.shape[1] > MAX_TRAINING_FEATURES:
         raise ValueError('training_features_excess')
 
-    if test.shape[0] > 100000:
+    if MAX_TEST_ROWS and test.shape[0] > MAX_TEST_ROWS:
         raise ValueError('test_rows_excess')
 
     metadata = {
@@ -155,10 +169,10 @@ def process_files(folder, label_column):
     with open(folder + '/metadata.json', 'w') as metafile:
         json.dump(metadata, metafile)
 
-def clean_csv_headers(file, label_column):
-    """Strips spaces from CSV headers"""
+def clean_csv_headers(file):
+    """Strips spaces from CSV headers, returning the rewritten CSV"""
 
     csv = pd.read_csv(file)
     csv.rename(columns=lambda x: x.strip(), inplace=True)
     csv.to_csv(file, index=False)
-    return csv.columns.drop(label_column).tolist()
+    return csv
@@ -17,13 +17,34 @@ import pandas as pd
 
 from ml.create_model import create_model
 from ml.list_pipelines import list_pipelines
+from ml.processors.estimators import ESTIMATOR_NAMES
+from ml.processors.feature_selection import FEATURE_SELECTOR_NAMES
+from ml.processors.scalers import SCALER_NAMES
+from ml.processors.searchers import SEARCHER_NAMES
+from ml.processors.scorers import SCORER_NAMES
+from ml.results import load_result_store
+from ml.task_store import task_queued
 from ml.generalization import generalize_ensemble, generalize_model
-from ml.predict import predict, predict_ensemble
+from ml.model_registry import copy_model, invalidate
+from ml.predict import predict, predict_ensemble, predict_tandem
 from ml.roc import additional_roc
 from ml.precision import additional_precision
 from ml.reliability import additional_reliability
 from worker import queue_training
 
+# Define the number of results per page (when paginated) and the maximum allowed
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Define the result filters, mapping the query parameter to its column and names
+RESULT_FILTERS = {
+    'estimator': ('algorithm', ESTIMATOR_NAMES),
+    'scaler': ('scaler', SCALER_NAMES),
+    'feature_selector': ('feature_selector', FEATURE_SELECTOR_NAMES),
+    'searcher': ('searcher', SEARCHER_NAMES),
+    'scorer': ('scorer', SCORER_NAMES)
+}
+
 def get():
     """Get all the jobs for a given user ID"""
 
@@ -54,7 +75,8 @@ def get():
                 ))
             ),
             'id': job,
-            'hasResults': os.path.exists(folder + '/' + job + '/report.csv'),
+            'hasResults': os.path.exists(folder + '/' + job + '/report.csv') or
+                          os.path.exists(folder + '/' + job + '/report.db'),
             'metadata': metadata
         })
 
@@ -106,6 +128,7 @@ def delete(jobid):
         return
 
     rmtree(folder)
+    invalidate(folder)
 
     return jsonify({'success': True})
 
@@ -118,6 +141,15 @@ def train(jobid):
 
     parameters = request.form.to_dict()
 
+    # The time (in seconds) and fit budgets are optional
+    for name, kind in [('time_budget', float), ('fit_budget', int)]:
+        if parameters.get(name):
+            try:
+                if kind(parameters[name]) < 0:
+                    abort(400)
+            except ValueError:
+                abort(400)
+
     pipelines = list_pipelines(parameters)
 
     job_folder = 'data/users/' + g.uid + '/jobs/' + jobid.urn[9:]
@@ -130,9 +162,13 @@ def train(jobid):
     with open(dataset_folder + '/metadata.json') as metafile:
         dataset_metadata = json.load(metafile)
 
+    # The task is recorded before it is queued so a worker never starts it unrecorded
+    task_id = str(uuid.uuid4())
+    task_queued(task_id, g.uid, jobid.urn[9:], metadata['datasetid'], dataset_metadata['label'], parameters)
+
     task = queue_training.s(
         g.uid, jobid.urn[9:], dataset_metadata['label'], parameters
-    ).apply_async()
+    ).apply_async(task_id=task_id)
 
     return jsonify({
         "id": task.id,
@@ -141,7 +177,12 @@ def train(jobid):
     }), 202
 
 def result(jobid):
-    """Retrieve the training results"""
+    """
+    Retrieve the training results, optionally filtered by pipeline
+    component (eg. `estimator=lr,svm`), sorted by any metric (`sort` and
+    `order`), paginated (`page` and `page_size`) and projected (`columns`).
+    Curves are omitted from paginated results unless `curves=true`.
+    """
 
     if g.uid is None:
         abort(401)
@@ -150,14 +191,48 @@ def result(jobid):
     folder = 'data/users/' + g.uid + '/jobs/' + jobid.urn[9:]
     metadata = None
 
-    if not os.path.exists(folder + '/report.csv'):
+    result_store = load_result_store(folder)
+    if result_store is None:
         abort(400)
         return
 
     try:
-        data = json.loads(pd.read_csv(folder + '/report.csv').to_json(orient='records'))
-    except ValueError:
+        columns = [x.strip() for x in request.args['columns'].split(',')] \
+            if request.args.get('columns') else None
+        curves = request.args.get('curves', 'false' if 'page' in request.args else 'true') == 'true'
+
+        filters = {}
+        for parameter, (column, names) in RESULT_FILTERS.items():
+            if request.args.get(parameter):
+                filters[column] = [names[x.strip()] for x in request.args[parameter].split(',')]
+
+        sort = request.args.get('sort')
+        if sort is not None and sort not in result_store.columns():
+            raise ValueError('Unknown sort column')
+
+        if request.args.get('order', 'desc') not in ['asc', 'desc']:
+            raise ValueError('Unknown sort order')
+
+        page = int(request.args['page']) if 'page' in request.args else None
+        page_size = min(int(request.args.get('page_size', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        if page is not None and (page < 1 or page_size < 1):
+            raise ValueError('Invalid page')
+    except (KeyError, ValueError):
+        result_store.close()
         abort(400)
+        return
+
+    data = result_store.load(
+        columns,
+        curves,
+        filters,
+        sort,
+        request.args.get('order', 'desc') == 'asc',
+        page_size if page is not None else None,
+        (page - 1) * page_size if page is not None else 0
+    )
+    total = result_store.count(filters)
+    result_store.close()
 
     if os.path.exists(folder + '/metadata.json'):
         with open(folder + '/metadata.json') as metafile:
@@ -165,6 +240,7 @@ def result(jobid):
 
     return jsonify({
         'results': data,
+        'total': total,
         'metadata': metadata
     })
 
@@ -244,7 +320,7 @@ def tandem(jobid):
     with open(job_folder + '/tandem_npv_features.json', 'w') as npv_features:
         json.dump(ast.literal_eval(request.form['npv_features']), npv_features)
 
-    copyfile(job_folder + '/pipeline.joblib', job_folder + '/tandem_npv.joblib')
+    copy_model(job_folder + '/pipeline.joblib', job_folder + '/tandem_npv.joblib')
     copyfile(job_folder + '/pipeline.pmml', job_folder + '/tandem_npv.pmml')
     copyfile(job_folder + '/pipeline.json', job_folder + '/tandem_npv.json')
 
@@ -260,7 +336,7 @@ def tandem(jobid):
     with open(job_folder + '/tandem_ppv_features.json', 'w') as ppv_features:
         json.dump(ast.literal_eval(request.form['ppv_features']), ppv_features)
 
-    copyfile(job_folder + '/pipeline.joblib', job_folder + '/tandem_ppv.joblib')
+    copy_model(job_folder + '/pipeline.joblib', job_folder + '/tandem_ppv.joblib')
     copyfile(job_folder + '/pipeline.pmml', job_folder + '/tandem_ppv.pmml')
     copyfile(job_folder + '/pipeline.json', job_folder + '/tandem_ppv.json')
 
@@ -300,7 +376,7 @@ def ensemble(jobid):
         with open(job_folder + '/ensemble' + str(x) + '_features.json', 'w') as model_features:
             json.dump(ast.literal_eval(request.form['model' + str(x) + '_features']), model_features)
 
-        copyfile(job_folder + '/pipeline.joblib', job_folder + '/ensemble' + str(x) + '.joblib')
+        copy_model(job_folder + '/pipeline.joblib', job_folder + '/ensemble' + str(x) + '.joblib')
         copyfile(job_folder + '/pipeline.json', job_folder + '/ensemble' + str(x) +'.json')
 
     reply = generalize_ensemble(total_models, job_folder, dataset_folder, dataset_metadata['label'])
@@ -347,35 +423,14 @@ def test_tandem(jobid):
     with open(folder + '/metadata.json') as metafile:
         metadata = json.load(metafile)
 
-    with open(folder + '/tandem_npv_features.json') as feature_file:
-        npv_features = json.load(feature_file)
-
     payload = json.loads(request.data)
     data = pd.DataFrame(payload['data'], columns=payload['features'])
 
-    npv_reply = pd.DataFrame(predict(
-        data[npv_features].to_numpy(),
-        folder + '/tandem_npv'
-    ))
-
-    with open(folder + '/tandem_ppv_features.json') as feature_file:
-        ppv_features = json.load(feature_file)
+    reply = predict_tandem(data, folder)
 
-    ppv_reply = pd.DataFrame(predict(
-        data[ppv_features].to_numpy(),
-        folder + '/tandem_ppv'
-    ))
-
-    ppv_reply['predicted'] = ppv_reply.apply(lambda row: row['predicted'] if row['predicted'] > 0 else -1, axis=1)
-    predicted = npv_reply.apply(lambda row: ppv_reply.iloc[row.name]['predicted'] if row['predicted'] > 0 else row['predicted'], axis=1)
-    npv_reply['probability'] = npv_reply.apply(lambda row: ppv_reply.iloc[row.name]['probability'] if row['predicted'] > 0 else row['probability'], axis=1)
-    npv_reply['predicted'] = predicted
+    reply['target'] = metadata['label']
 
-    return jsonify({
-      'predicted': npv_reply['predicted'].to_list(),
-      'probability': npv_reply['probability'].to_list(),
-      'target': metadata['label']
-    })
+    return jsonify(reply)
 
 def test_ensemble(jobid):
     """Tests the selected ensemble model against the provided data"""
@@ -11,18 +11,25 @@ import uuid
 import zipfile
 from io import BytesIO
 from shutil import copyfile
+from tempfile import TemporaryFile
 
-from flask import abort, g, jsonify, request, send_file
+from flask import Response, abort, g, jsonify, request, send_file, stream_with_context, url_for
 
-from ml.predict import predict
+from ml.batching import PredictionBatcher
+from ml.predict import predict_stream
 from ml.generalization import generalize_model
+from ml.model_registry import cache_info, copy_model, invalidate
 from ml.reliability import additional_reliability
 from ml.roc import additional_roc
 from ml.precision import additional_precision
+from worker import queue_scoring
 from .jobs import refit
 
 PUBLISHED_MODELS = 'data/published-models.json'
 
+# Concurrent tests of a published model are scored together
+PREDICTION_BATCHER = PredictionBatcher()
+
 def get():
     """Get all published models for a given user ID"""
 
@@ -60,7 +67,8 @@ def delete(name):
         abort(400)
         return
 
-    published.pop(name, None)
+    model = published.pop(name, None)
+    invalidate(model['path'] + '.joblib')
 
     with open(PUBLISHED_MODELS, 'w') as published_file:
         json.dump(published, published_file)
@@ -111,7 +119,7 @@ def test(name):
     with open(folder + '/metadata.json') as metafile:
         metadata = json.load(metafile)
 
-    reply = predict(
+    reply = PREDICTION_BATCHER.predict(
         json.loads(request.data),
         published[name]['path'],
         published[name]['threshold']
@@ -121,6 +129,142 @@ def test(name):
 
     return jsonify(reply)
 
+def score(name):
+    """Scores the uploaded CSV file against the published model, streaming the results"""
+
+    if not os.path.exists(PUBLISHED_MODELS):
+        abort(400)
+        return
+
+    with open(PUBLISHED_MODELS) as published_file:
+        published = json.load(published_file)
+
+    if name not in published:
+        abort(400)
+        return
+
+    output_format = request.args.get('format', 'csv')
+    if output_format not in ['csv', 'ndjson']:
+        abort(400)
+        return
+
+    # Uploads are copied aside as the form is closed before the response is
+    # streamed, large files are best sent as the request body instead
+    if 'file' in request.files:
+        file = TemporaryFile()
+        request.files['file'].save(file)
+        file.seek(0)
+    else:
+        file = request.stream
+
+    return Response(
+        stream_with_context(predict_stream(
+            file,
+            published[name]['path'],
+            published[name]['threshold'] if 'threshold' in published[name] else .5,
+            ast.literal_eval(published[name]['features']),
+            output_format
+        )),
+        mimetype='text/csv' if output_format == 'csv' else 'application/x-ndjson',
+        headers={'Content-Disposition': 'attachment;filename=' + name + '.' + output_format}
+    )
+
+def add_score(name):
+    """Queues the scoring of a dataset or uploaded CSV file against the published model"""
+
+    if g.uid is None:
+        abort(401)
+        return
+
+    if not os.path.exists(PUBLISHED_MODELS):
+        abort(400)
+        return
+
+    with open(PUBLISHED_MODELS) as published_file:
+        published = json.load(published_file)
+
+    if name not in published:
+        abort(400)
+        return
+
+    output_format = request.form.get('format', 'csv')
+    if output_format not in ['csv', 'ndjson']:
+        abort(400)
+        return
+
+    scoreid = uuid.uuid4().urn[9:]
+    folder = 'data/users/' + g.uid + '/scores/' + scoreid
+
+    if 'file' in request.files:
+        os.makedirs(folder)
+        input_path = folder + '/input.csv'
+        request.files['file'].save(input_path)
+    elif 'datasetid' in request.form:
+        # Only the caller's own datasets are scored, the ID is parsed as a UUID as the dataset routes do
+        try:
+            datasetid = uuid.UUID(request.form['datasetid']).urn[9:]
+        except ValueError:
+            abort(400)
+            return
+
+        input_path = 'data/users/' + g.uid + '/datasets/' + datasetid + '/' +\
+            ('train' if request.form.get('split') == 'train' else 'test') + '.csv'
+
+        if not os.path.exists(input_path):
+            abort(400)
+            return
+
+        os.makedirs(folder)
+    else:
+        abort(400)
+        return
+
+    with open(folder + '/metadata.json', 'w') as metafile:
+        json.dump({'name': name, 'format': output_format}, metafile)
+
+    task = queue_scoring.s(
+        g.uid,
+        scoreid,
+        input_path,
+        published[name]['path'],
+        published[name]['threshold'] if 'threshold' in published[name] else .5,
+        ast.literal_eval(published[name]['features']),
+        output_format
+    ).apply_async()
+
+    return jsonify({
+        'id': scoreid,
+        'task_id': task.id,
+        'href': url_for('status', task_id=task.id)
+    }), 202
+
+def export_score(name, scoreid):
+    """Export the results of a completed scoring of the published model"""
+
+    if g.uid is None:
+        abort(401)
+        return
+
+    folder = 'data/users/' + g.uid + '/scores/' + scoreid.urn[9:]
+
+    if not os.path.exists(folder + '/metadata.json'):
+        abort(400)
+        return
+
+    with open(folder + '/metadata.json') as metafile:
+        metadata = json.load(metafile)
+
+    if metadata['name'] != name or 'date' not in metadata:
+        abort(400)
+        return
+
+    return send_file(
+        folder + '/output.' + metadata['format'],
+        attachment_filename=name + '.' + metadata['format'],
+        as_attachment=True,
+        cache_timeout=-1
+    )
+
 def generalize(name):
     """Generalize the published model against the provided data"""
 
@@ -257,7 +401,8 @@ def add(name):
     job_folder = 'data/users/' + g.uid + '/jobs/' + request.form['job']
     model_path = job_folder + '/' + name
 
-    copyfile(job_folder + '/pipeline.joblib', model_path + '.joblib')
+    copy_model(job_folder + '/pipeline.joblib', model_path + '.joblib')
+    invalidate(model_path + '.joblib')
     copyfile(job_folder + '/input.csv', model_path + '.csv')
     try:
         copyfile(job_folder + '/pipeline.pmml', model_path + '.pmml')
@@ -287,3 +432,12 @@ def add(name):
         json.dump(published, published_file)
 
     return jsonify({'success': True})
+
+def cache():
+    """Returns the counters of the in-process model cache"""
+
+    if g.uid is None:
+        abort(401)
+        return
+
+    return jsonify(cache_info())
@@ -24,9 +24,12 @@ PARAMETERS = dict(
     ignore_estimator=os.getenv('IGNORE_ESTIMATOR', ''),
     ignore_feature_selector=os.getenv('IGNORE_FEATURE_SELECTOR', ''),
     ignore_scaler=os.getenv('IGNORE_SCALER', ''),
-    ignore_searcher=os.getenv('IGNORE_SEARCHER', ''),
+    ignore_searcher=os.getenv('IGNORE_SEARCHER', DEFAULT_IGNORE_SEARCHER),
     ignore_shuffle=os.getenv('IGNORE_SHUFFLE', ''),
-    ignore_scorer=os.getenv('IGNORE_SCORER', '')
+    early_stopping=os.getenv('EARLY_STOPPING', ''),
+    ignore_scorer=os.getenv('IGNORE_SCORER', ''),
+    time_budget=os.getenv('TIME_BUDGET', ''),
+    fit_budget=os.getenv('FIT_BUDGET', '')
 )
 
 hyper_parameters = os.getenv('CUSTOM_HYPER_PARAMETERS', None)
@@ -0,0 +1,108 @@
+"""
+Coalesce the concurrent prediction requests made against the same model
+so the model's inference runs once per batch rather than once per request.
+"""
+
+import os
+from threading import Condition, Event
+
+import numpy as np
+import pandas as pd
+
+from .model_registry import load_model
+from .predict import label_probabilities
+
+# Define how long (in milliseconds) a batch waits for further requests
+BATCH_WINDOW = float(os.getenv('BATCH_WINDOW', 5))
+
+# Define the maximum number of requests scored within a batch
+BATCH_SIZE = int(os.getenv('BATCH_SIZE', 32))
+
+class PredictionBatcher:
+    """
+    The first request made against a model opens a batch and waits up to
+    `window` milliseconds (or until `size` requests joined the batch) before
+    scoring every request of the batch at once on behalf of the others.
+    """
+
+    def __init__(self, window=BATCH_WINDOW, size=BATCH_SIZE):
+        self.window = window
+        self.size = size
+        self.condition = Condition()
+        self.batches = {}
+
+    def predict(self, data, path='.', threshold=.5):
+        """Predicts against the provided data, as `ml.predict.predict` does"""
+
+        data = pd.DataFrame(data).dropna().values
+
+        # Rows of different widths can not be stacked, they are batched apart
+        key = (path, data.shape[1] if data.ndim == 2 else 0)
+
+        with self.condition:
+            batch = self.batches.get(key)
+            leader = batch is None
+            if leader:
+                batch = self.batches[key] = _Batch()
+
+            index = len(batch.requests)
+            batch.requests.append((data, threshold))
+
+            if len(batch.requests) >= self.size:
+                self.batches.pop(key, None)
+                self.condition.notify_all()
+
+        if leader:
+            with self.condition:
+                self.condition.wait_for(lambda: self.batches.get(key) is not batch, self.window / 1000)
+                if self.batches.get(key) is batch:
+                    self.batches.pop(key)
+
+            batch.run(path)
+        else:
+            batch.done.wait()
+
+        if batch.errors[index] is not None:
+            raise batch.errors[index]
+
+        return batch.replies[index]
+
+class _Batch:
+    """Requests made against a model within a batching window"""
+
+    def __init__(self):
+        self.requests = []
+        self.replies = None
+        self.errors = None
+        self.done = Event()
+
+    def run(self, path):
+        """
+        Score the stacked requests and label the probabilities of each of them,
+        when the batch fails its requests are scored apart so only the requests
+        at fault fail.
+        """
+
+        self.replies = [None] * len(self.requests)
+        self.errors = [None] * len(self.requests)
+
+        try:
+            pipeline = load_model(path + '.joblib')
+
+            try:
+                probabilities = pipeline.predict_proba(np.concatenate([rows for rows, _ in self.requests]))
+
+                start = 0
+                for index, (rows, threshold) in enumerate(self.requests):
+                    self.replies[index] = label_probabilities(probabilities[start:start + len(rows)], threshold)
+                    start += len(rows)
+            except Exception:
+                for index, (rows, threshold) in enumerate(self.requests):
+                    try:
+                        self.replies[index] = label_probabilities(pipeline.predict_proba(rows), threshold)
+                    except Exception as error:
+                        self.errors[index] = error
+        except Exception as error:
+            self.errors = [error] * len(self.requests)
+        finally:
+            self.done.set()
@@ -0,0 +1,78 @@
+"""
+Time and fit budget of a job: pipelines are started while budget remains,
+the pipelines of the estimators scoring best in cross validation first.
+"""
+
+from timeit import default_timer as timer
+
+import numpy as np
+
+class SearchBudget:
+    """
+    Allocates the `time_budget` (in seconds) and the `fit_budget` of a job
+    across its pipelines. Each estimator is probed with its cheapest pipeline
+    first, the other pipelines are then started by the best cross validation
+    score of their estimator. A pipeline is only started while its projected
+    run time, and its number of fits (as counted by its searcher), fit the
+    budget left. `spent_time`, `spent_fits` and `scores` carry over what a
+    resumed job already spent and learned.
+    """
+
+    def __init__(self, pipelines, costs, fits, time_budget=0, fit_budget=0, spent_time=0, spent_fits=0, scores=None):
+        self.pipelines = pipelines
+        self.costs = costs
+        self.fits = fits
+        self.time_budget = time_budget
+        self.fit_budget = fit_budget
+        self.start = timer() - spent_time
+        self.spent_fits = spent_fits
+        self.scores = dict(scores or {})
+        self.running = {}
+        self.projected_time = self.actual_time = 0
+
+    def choose(self, ready):
+        """Index of the pipeline to start next amongst those ready, None once the budget is spent"""
+
+        candidates = [index for index in ready if self._fits_budget(index)]
+        if not candidates:
+            return None
+
+        # Probe the estimators not yet scored (or being scored), the cheapest pipeline first
+        probes = [
+            index for index in candidates
+            if self.pipelines[index][0] not in self.scores and self.pipelines[index][0] not in self.running.values()
+        ]
+
+        if probes:
+            index = min(probes, key=lambda index: (self.costs[index] or 0, index))
+        else:
+            index = max(candidates, key=lambda index: (self.scores.get(self.pipelines[index][0], -np.inf), -index))
+
+        self.running[index] = self.pipelines[index][0]
+        return index
+
+    def record(self, index, pipeline_result):
+        """Record the score, fits and run time of a completed pipeline"""
+
+        estimator = self.running.pop(index, self.pipelines[index][0])
+        self.scores[estimator] = max(self.scores.get(estimator, -np.inf), pipeline_result['cv_score'])
+        self.spent_fits += pipeline_result['fits']
+
+        if self.costs[index] is not None:
+            self.projected_time += self.costs[index]
+            self.actual_time += pipeline_result['train_time']
+
+    def _fits_budget(self, index):
+        """Whether a pipeline is projected to complete within the budget left"""
+
+        if self.time_budget:
+            scale = self.actual_time / self.projected_time if self.projected_time else 1
+            if timer() - self.start + (self.costs[index] or 0) * scale > self.time_budget:
+                return False
+
+        if self.fit_budget:
+            running_fits = sum(self.fits[running] for running in self.running)
+            if self.spent_fits + running_fits + self.fits[index] > self.fit_budget:
+                return False
+
+        return True
@@ -0,0 +1,35 @@
+"""
+Cache of fitted pre-processing steps shared by every pipeline of a job
+which uses the same scaler and feature selector, and of the refitted
+estimators shared by every scorer and searcher of a pipeline prefix.
+"""
+
+import os
+from shutil import rmtree
+
+from joblib import Memory
+
+# Define the maximum size of the cache (in megabytes)
+TRANSFORM_CACHE_SIZE = int(os.getenv('TRANSFORM_CACHE_SIZE', 2048))
+
+def create_transform_cache(output_path):
+    """Create the cache for the provided job folder"""
+
+    return Memory(output_path + '/cache', verbose=0)
+
+def reduce_transform_cache(memory):
+    """Evict the least recently used entries once the cache exceeds its size"""
+
+    bytes_limit = TRANSFORM_CACHE_SIZE * 1024 * 1024
+
+    try:
+        memory.reduce_size(bytes_limit=bytes_limit)
+    except TypeError:
+        # Older joblib releases read the limit from the instance
+        memory.bytes_limit = bytes_limit
+        memory.reduce_size()
+
+def clear_transform_cache(memory):
+    """Remove the cache once the job has finished"""
+
+    rmtree(memory.location, ignore_errors=True)
@@ -0,0 +1,172 @@
+"""
+Expected run time of the pipelines of a job learned from the performance
+reports of earlier jobs. It orders the pipelines (longest first), projects
+the remaining time of a job and fits a job within a time budget.
+"""
+
+import csv
+import heapq
+import json
+import os
+
+import numpy as np
+
+from .processors.searchers import SEARCHER_DEPENDENCIES
+
+# Define how many earlier jobs the run time of the pipelines is learned from
+COST_MODEL_JOBS = int(os.getenv('COST_MODEL_JOBS', 50))
+
+class RuntimeModel:
+    """
+    The run time of a pipeline is modelled as `rate * size ** exponent` where
+    size is the number of cells (rows x features) searched. The exponent is
+    fitted per estimator and the rate per estimator, searcher and feature
+    selector (falling back to coarser groups when a combination never ran).
+    """
+
+    def __init__(self, records=()):
+        self.exponents = {}
+        self.rates = {}
+
+        records = [record for record in records if record['size'] > 0 and record['train_time'] > 0]
+
+        # The exponent is fitted within each group (so the rates of the groups do not skew it)
+        deviations = {}
+        for key in {(record['estimator'], record['searcher'], record['feature_selector']) for record in records}:
+            group = [record for record in records if _group_keys(
+                record['estimator'], record['searcher'], record['feature_selector'])[0] == key]
+            sizes = np.log([record['size'] for record in group])
+            times = np.log([record['train_time'] for record in group])
+            deviations.setdefault(key[0], []).append((sizes - sizes.mean(), times - times.mean()))
+
+        for estimator, groups in deviations.items():
+            sizes = np.concatenate([sizes for sizes, _ in groups])
+            times = np.concatenate([times for _, times in groups])
+
+            if (sizes ** 2).sum() > 0:
+                self.exponents[estimator] = float(np.clip((sizes * times).sum() / (sizes ** 2).sum(), .5, 2))
+
+        rates = {}
+        for record in records:
+            rate = record['train_time'] / record['size'] ** self.exponents.get(record['estimator'], 1)
+
+            for key in _group_keys(record['estimator'], record['searcher'], record['feature_selector']):
+                rates.setdefault(key, []).append(rate)
+
+        self.rates = {key: float(np.median(values)) for key, values in rates.items()}
+
+    def predict(self, pipeline, size):
+        """Expected run time (in seconds) of a pipeline for the size searched, None when unknown"""
+
+        estimator, _, feature_selector, searcher = pipeline
+
+        for key in _group_keys(estimator, searcher, feature_selector):
+            if key in self.rates:
+                return self.rates[key] * size ** self.exponents.get(estimator, 1)
+
+        return None
+
+def load_runtime_model(output_path, max_jobs=COST_MODEL_JOBS):
+    """Learn the run time of the pipelines from the latest completed jobs next to the job folder"""
+
+    jobs = []
+    folder = os.path.dirname(os.path.abspath(output_path))
+
+    for job in os.listdir(folder) if max_jobs > 0 else []:
+        job_folder = folder + '/' + job
+        if not os.path.exists(job_folder + '/performance_report.csv') or\
+            not os.path.exists(job_folder + '/metadata.json'):
+            continue
+
+        with open(job_folder + '/metadata.json') as metafile:
+            try:
+                metadata = json.load(metafile)
+            except ValueError:
+                continue
+
+        # Only completed jobs have a date
+        if 'date' in metadata and 'search_shape' in metadata:
+            jobs.append((metadata['date'], job_folder, metadata['search_shape']))
+
+    records = []
+    for _, job_folder, (rows, features) in sorted(jobs, reverse=True)[:max_jobs]:
+        with open(job_folder + '/performance_report.csv') as performance_report:
+            for row in csv.DictReader(performance_report):
+                if row['key'] == 'total':
+                    continue
+
+                scaler, feature_selector, estimator, searcher = row['key'].split('__')[:4]
+                records.append({
+                    'estimator': estimator,
+                    'scaler': scaler,
+                    'feature_selector': feature_selector,
+                    'searcher': searcher,
+                    'size': rows * features,
+                    'train_time': float(row['train_time (s)'])
+                })
+
+    return RuntimeModel(records)
+
+def longest_first(costs):
+    """Indices of the pipelines, the longest first (in order when any cost is unknown)"""
+
+    if None in costs:
+        return list(range(len(costs)))
+
+    return sorted(range(len(costs)), key=lambda index: -costs[index])
+
+def makespan(costs, slots=1):
+    """Projected time to run the pipelines, longest first, across the slots"""
+
+    loads = [0] * max(1, slots)
+    for cost in sorted(costs, reverse=True):
+        heapq.heappush(loads, heapq.heappop(loads) + cost)
+
+    return max(loads)
+
+def remaining_time(costs, slots=1, scale=1):
+    """Projected time (in seconds) to run the remaining pipelines, None when their cost is unknown"""
+
+    if None in costs:
+        return None
+
+    return round(makespan(costs, slots) * scale, 1)
+
+def fit_budget(pipelines, model, size, budget, searchers, slots=1):
+    """
+    Downgrade the most expensive pipelines to a cheaper searcher amongst
+    those the job allows (`searchers`), or drop them when none is cheaper,
+    until the projected run time of the job fits the budget (in seconds).
+    Returns the pipelines kept along with their costs.
+    """
+
+    pipelines = list(pipelines)
+    costs = [model.predict(pipeline, size) for pipeline in pipelines]
+
+    if None in costs:
+        print('Warning: the run time of some pipelines is unknown, the time budget is not planned for')
+        return (pipelines, costs)
+
+    while pipelines and makespan(costs, slots) > budget:
+        index = int(np.argmax(costs))
+        estimator, scaler, feature_selector, searcher = pipelines[index]
+
+        alternatives = [
+            (model.predict(alternative, size), alternative)
+            for alternative in [(estimator, scaler, feature_selector, name) for name in searchers]
+            if alternative[3] not in SEARCHER_DEPENDENCIES and alternative not in pipelines
+        ]
+        alternatives = [alternative for alternative in alternatives if alternative[0] < costs[index]]
+
+        if alternatives:
+            costs[index], pipelines[index] = min(alternatives)
+        else:
+            pipelines.pop(index)
+            costs.pop(index)
+
+    return (pipelines, costs)
+
+def _group_keys(estimator, searcher, feature_selector):
+    """Groups a pipeline's run time is learned for, the most specific first"""
+
+    return [(estimator, searcher, feature_selector), (estimator, searcher), (estimator,), ()]
@@ -7,7 +7,6 @@ import os
 import json
 import numpy as np
 import pandas as pd
-from joblib import dump, load
 from nyoka import skl_to_pmml, xgboost_to_pmml
 from sklearn.pipeline import Pipeline
 
@@ -17,6 +16,7 @@ from .processors.scalers import SCALERS
 from .import_data import import_data
 from .generalization import generalize
 from .model import generate_model
+from .model_registry import dump_model, read_model
 from .utils import explode_key
 
 def create_model(key, hyper_parameters, selected_features, dataset_path=None, label_column=None, output_path='.', threshold=.5):
@@ -62,7 +62,7 @@ def create_model(key, hyper_parameters, selected_features, dataset_path=None, la
 
     # If the model is DNN or RF, attempt to swap the estimator for a pickled one
     if os.path.exists(output_path + '/models/' + key + '.joblib'):
-      pickled_estimator = load(output_path + '/models/' + key + '.joblib')
+      pickled_estimator = read_model(output_path + '/models/' + key + '.joblib')
       pipeline = Pipeline(pipeline.steps[:-1] + [('estimator', pickled_estimator)])
 
     # Assess the model performance and store the results
@@ -71,7 +71,7 @@ def create_model(key, hyper_parameters, selected_features, dataset_path=None, la
         json.dump(generalization_result, statsfile)
 
     # Dump the pipeline to a file
-    dump(pipeline, output_path + '/pipeline.joblib')
+    dump_model(pipeline, output_path + '/pipeline.joblib')
     pd.DataFrame([selected_features]).to_csv(output_path + '/input.csv', index=False, header=False)
 
     # Export the model as a PMML
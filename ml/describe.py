@@ -6,6 +6,8 @@ dataset.
 import pandas as pd
 import numpy as np
 
+from .import_data import cache_frame, clean_csv, load_cache
+
 def describe(folder, label):
     """Accept the training and testing data sets and describe them"""
 
@@ -17,16 +19,26 @@ def describe(folder, label):
 def parse_csv(csv_file, label):
     """Parse the CSV file and get required details"""
 
-    csv = pd.read_csv(csv_file)
-    csv_clean = csv.apply(pd.to_numeric, errors='coerce').dropna()
+    cache = load_cache(csv_file, label)
+
+    if cache is not None:
+        csv_clean = cache_frame(cache)
+        null = cache['rows'] - len(csv_clean.index)
+        invalid = cache['invalid']
+    else:
+        csv = pd.read_csv(csv_file)
+        csv_clean = clean_csv(csv)
+        null = len(csv.index) - len(csv_clean.index)
+        invalid = csv.loc[:, (csv.dtypes != np.int64) & (csv.dtypes != np.float64)].columns.values.tolist()
+
     csv_positives = csv_clean[csv_clean[label] == 1]
     csv_negatives = csv_clean[csv_clean[label] == 0]
     histogram_positives = {key:[i.tolist() for i in np.histogram(list(value.values()), bins=10, range=(csv_clean[key].min(), csv_clean[key].max()))] for (key,value) in csv_positives.to_dict().items()}
     histogram_negatives = {key:[i.tolist() for i in np.histogram(list(value.values()), bins=10, range=(csv_clean[key].min(), csv_clean[key].max()))] for (key,value) in csv_negatives.to_dict().items()}
 
     return {
-        'null': len(csv.index) - len(csv_clean.index),
-        'invalid': csv.loc[:, (csv.dtypes != np.int64) & (csv.dtypes != np.float64)].columns.values.tolist(),
+        'null': null,
+        'invalid': invalid,
         'mode': csv_clean.mode().iloc[0].to_dict(),
         'median': csv_clean.median().to_dict(),
         'summary': csv_clean.describe().to_dict(),
@@ -0,0 +1,52 @@
+"""
+Transform a dataset and run the model's inference once, so every metric
+and curve (and the predictions themselves) can be derived from the same
+probabilities and scores.
+"""
+
+import numpy as np
+
+from .preprocess import preprocess
+
+def score_model(features, model, pipeline, x, threshold=.5):
+    """
+    Compute the probabilities, predictions and calibration scores
+    (the normalized decision function when available) of a dataset.
+    """
+
+    # Process the data based on the pipeline
+    x = preprocess(features, pipeline, x)
+    probabilities = model.predict_proba(x)[:, 1]
+
+    predictions = model.classes_[threshold_predictions(probabilities, threshold)]
+
+    if hasattr(model, 'decision_function'):
+        scores = normalize_decision(model.decision_function(x))
+    else:
+        scores = probabilities
+
+    return {
+        'probabilities': probabilities,
+        'predictions': predictions,
+        'scores': scores
+    }
+
+def threshold_predictions(probabilities, threshold=.5):
+    """Label the samples whose probability of the positive class reaches the threshold"""
+
+    # The default threshold matches the argmax of the probabilities (ties are negative)
+    if threshold == .5:
+        return (probabilities > threshold).astype(int)
+
+    return (probabilities >= threshold).astype(int)
+
+def normalize_decision(decision):
+    """Scale the decision function to the [0, 1] range"""
+
+    if np.count_nonzero(decision):
+        if decision.max() - decision.min() == 0:
+            decision = [0] * len(decision)
+        else:
+            decision = (decision - decision.min()) / (decision.max() - decision.min())
+
+    return decision
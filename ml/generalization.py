@@ -2,41 +2,31 @@
 Generalization of a provided model using a secondary test set.
 """
 
-from joblib import load
 import pandas as pd
 from sklearn.metrics import roc_auc_score, accuracy_score,\
     confusion_matrix, classification_report, f1_score, roc_curve,\
     matthews_corrcoef
 
-from .preprocess import preprocess
-from .predict import predict_ensemble
+from .evaluate import score_model, threshold_predictions
+from .model_registry import load_model
+from .predict import ensemble_probabilities, vote
 from .import_data import import_csv
 from .stats import clopper_pearson, roc_auc_ci, ppv_95_ci, npv_95_ci
 
 def generalize(features, model, pipeline, x2, y2, labels=None, threshold=.5):
     """"Generalize method"""
 
-    # Process test data based on pipeline
-    x2 = preprocess(features, pipeline, x2)
-    probabilities = model.predict_proba(x2)[:, 1]
-    if threshold == .5:
-      predictions = model.predict(x2)
-    else:
-      predictions = (probabilities >= threshold).astype(int)
-
-    return generalization_report(labels, y2, predictions, probabilities)
+    scores = score_model(features, model, pipeline, x2, threshold)
+    return generalization_report(labels, y2, scores['predictions'], scores['probabilities'])
 
 def generalize_model(payload, label, folder, threshold=.5):
     data = pd.DataFrame(payload['data'], columns=payload['columns']).apply(pd.to_numeric, errors='coerce').dropna()
     x = data[payload['features']].to_numpy()
     y = data[label]
 
-    pipeline = load(folder + '.joblib')
+    pipeline = load_model(folder + '.joblib')
     probabilities = pipeline.predict_proba(x)[:, 1]
-    if threshold == .5:
-      predictions = pipeline.predict(x)
-    else:
-      predictions = (probabilities >= threshold).astype(int)
+    predictions = threshold_predictions(probabilities, threshold)
 
     return generalization_report(['No ' + label, label], y, predictions, probabilities)
 
@@ -45,8 +35,10 @@ def generalize_ensemble(total_models, job_folder, dataset_folder, label):
 
     data = pd.DataFrame(x2, columns=feature_names)
 
-    soft_result = predict_ensemble(total_models, data, job_folder, 'soft')
-    hard_result = predict_ensemble(total_models, data, job_folder, 'hard')
+    # Both votes are derived from a single inference of every model
+    probabilities = ensemble_probabilities(total_models, data, job_folder)
+    soft_result = vote(probabilities, 'soft')
+    hard_result = vote(probabilities, 'hard')
 
     return {
         'soft_generalization': generalization_report(['No ' + label, label], y2, soft_result['predicted'], soft_result['probability']),
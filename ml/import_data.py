@@ -1,7 +1,12 @@
 """
-Import data and process/clean data
+Import data and process/clean data, datasets are cleaned once when uploaded
+and cached as NumPy arrays (along with a schema) which are memory mapped.
 """
 
+import json
+import os
+
+import numpy as np
 import pandas as pd
 
 from sklearn.model_selection import train_test_split
@@ -32,26 +37,30 @@ def import_train(train_path, label_column):
 def import_csv(path, label_column, show_warning=False):
     """Import the specificed sheet"""
 
-    # Read the CSV to memory and drop rows with empty values
-    data = pd.read_csv(path)
+    cache = load_cache(path, label_column)
 
-    # Convert cell values to numerical data and drop invalid data
-    data = data.apply(pd.to_numeric, errors='coerce').dropna()
+    if cache is not None:
+        x = cache['x']
+        y = pd.Series(cache['y'], name=label_column)
+        feature_names = cache['features']
+    else:
+        # Read the CSV to memory, convert cell values to numerical data and drop invalid data
+        data = clean_csv(pd.read_csv(path))
 
-    # Drop the label column from the data
-    x = data.drop(label_column, axis=1)
+        # Drop the label column from the data
+        x = data.drop(label_column, axis=1)
 
-    # Save the label colum values
-    y = data[label_column]
+        # Save the label colum values
+        y = data[label_column]
 
-    # Grab the feature names
-    feature_names = list(x)
+        # Grab the feature names
+        feature_names = list(x)
 
-    # Convert to NumPy array
-    x = x.to_numpy()
+        # Convert to NumPy array
+        x = x.to_numpy()
 
-    negative_count = data[data[label_column] == 0].shape[0]
-    positive_count = data[data[label_column] == 1].shape[0]
+    negative_count = int((y == 0).sum())
+    positive_count = int((y == 1).sum())
 
     if show_warning:
         print('Negative Cases: %.7g\nPositive Cases: %.7g\n' % (negative_count, positive_count))
@@ -60,3 +69,71 @@ def import_csv(path, label_column, show_warning=False):
             print('Warning: Classes are not balanced.')
 
     return [x, y, feature_names, negative_count, positive_count]
+
+def clean_csv(data):
+    """Convert cell values to numerical data and drop the rows with invalid or empty values"""
+
+    return data.apply(pd.to_numeric, errors='coerce').dropna()
+
+def cache_csv(path, label_column, csv=None):
+    """Clean a CSV file once and cache its features, labels and schema (`csv` when already read)"""
+
+    if csv is None:
+        csv = pd.read_csv(path)
+
+    data = clean_csv(csv)
+    prefix = os.path.splitext(path)[0]
+    status = os.stat(path)
+
+    schema = {
+        'source': [status.st_mtime_ns, status.st_size],
+        'label': label_column,
+        'features': data.columns.drop(label_column).tolist(),
+        'columns': data.columns.tolist(),
+        'dtypes': {name: str(dtype) for name, dtype in data.dtypes.items()},
+        'rows': len(csv.index),
+        'invalid': csv.loc[:, (csv.dtypes != np.int64) & (csv.dtypes != np.float64)].columns.values.tolist()
+    }
+
+    # Write aside so concurrent readers never load a partial cache
+    for suffix, array in [('_x.npy', data.drop(label_column, axis=1).to_numpy()), ('_y.npy', data[label_column].to_numpy())]:
+        with open(prefix + suffix + '.tmp', 'wb') as cache_file:
+            np.save(cache_file, array)
+        os.replace(prefix + suffix + '.tmp', prefix + suffix)
+
+    with open(prefix + '_schema.json.tmp', 'w') as schema_file:
+        json.dump(schema, schema_file)
+    os.replace(prefix + '_schema.json.tmp', prefix + '_schema.json')
+
+    return data
+
+def load_cache(path, label_column):
+    """
+    Load the cache of a CSV file with its arrays memory mapped (read only),
+    None when the file was not cached, has changed or uses another label.
+    """
+
+    prefix = os.path.splitext(path)[0]
+    if not os.path.exists(prefix + '_schema.json') or not os.path.exists(path):
+        return None
+
+    with open(prefix + '_schema.json') as schema_file:
+        schema = json.load(schema_file)
+
+    status = os.stat(path)
+    if schema['source'] != [status.st_mtime_ns, status.st_size] or schema['label'] != label_column:
+        return None
+
+    return dict(
+        schema,
+        x=np.load(prefix + '_x.npy', mmap_mode='r'),
+        y=np.load(prefix + '_y.npy', mmap_mode='r')
+    )
+
+def cache_frame(cache):
+    """Cleaned data frame (features and label, with their original types) of a cache"""
+
+    data = pd.DataFrame(cache['x'], columns=cache['features'])
+    data.insert(cache['columns'].index(cache['label']), cache['label'], cache['y'])
+
+    return data.astype(cache['dtypes'])
@@ -7,7 +7,7 @@ import itertools
 from .processors.estimators import ESTIMATOR_NAMES
 from .processors.feature_selection import FEATURE_SELECTOR_NAMES
 from .processors.scalers import SCALER_NAMES
-from .processors.searchers import SEARCHER_NAMES
+from .processors.searchers import DEFAULT_IGNORE_SEARCHER, SEARCHER_NAMES
 from .processors.scorers import SCORER_NAMES
 
 def list_pipelines(parameters):
@@ -17,7 +17,7 @@ def list_pipelines(parameters):
     ignore_feature_selector = \
         [x.strip() for x in parameters.get('ignore_feature_selector', '').split(',')]
     ignore_scaler = [x.strip() for x in parameters.get('ignore_scaler', '').split(',')]
-    ignore_searcher = [x.strip() for x in parameters.get('ignore_searcher', '').split(',')]
+    ignore_searcher = [x.strip() for x in parameters.get('ignore_searcher', DEFAULT_IGNORE_SEARCHER).split(',')]
     ignore_scorer = [x.strip() for x in parameters.get('ignore_scorer', '').split(',')]
 
     return list(itertools.product(*[
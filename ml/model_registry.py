@@ -0,0 +1,118 @@
+"""
+In-process cache of the exported pipelines (and their feature lists) used
+by the prediction endpoints. Entries are keyed by path and modification
+time so a republished model is reloaded, and the least recently used
+entries are evicted once the cache exceeds its size.
+
+Models are dumped uncompressed and loaded memory mapped, so the arrays of
+a model (eg. support vectors or the training set of a kNN) are shared
+between the processes serving it rather than copied into each of them.
+"""
+
+import json
+import os
+from collections import OrderedDict
+from shutil import copyfile
+from threading import Lock
+
+from joblib import dump, load
+
+# Define the maximum size of the cache (in megabytes)
+MODEL_CACHE_SIZE = int(os.getenv('MODEL_CACHE_SIZE', 512))
+
+_lock = Lock()
+_entries = OrderedDict()
+_statistics = {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0}
+
+def load_model(path):
+    """Load an exported pipeline (eg. `pipeline.joblib`)"""
+
+    return _get(path, read_model)
+
+def read_model(path):
+    """Load a model without caching it, its arrays memory mapped"""
+
+    # Copy-on-write keeps the pages shared while estimators which require
+    # writable buffers (eg. the libsvm based SVC) can still use the arrays
+    return load(path, mmap_mode='c')
+
+def dump_model(model, path):
+    """Dump a model uncompressed, so it can be memory mapped, and atomically"""
+
+    temporary_path = path + '.' + str(os.getpid())
+    dump(model, temporary_path, compress=0)
+    os.replace(temporary_path, path)
+
+def copy_model(source, destination):
+    """Atomically copy a model, processes mapping the previous file keep their pages"""
+
+    temporary_path = destination + '.' + str(os.getpid())
+    copyfile(source, temporary_path)
+    os.replace(temporary_path, destination)
+
+def load_features(path):
+    """Load the feature list of an exported pipeline (eg. `ensemble0_features.json`)"""
+
+    return _get(path, _load_json)
+
+def invalidate(path=None):
+    """Remove the entries of a file, or of every file within a folder, or every entry"""
+
+    with _lock:
+        for key in list(_entries):
+            if path is None or key == path or key.startswith(path.rstrip('/') + '/'):
+                _remove(key)
+
+def cache_info():
+    """Hit, miss and eviction counters along with the current usage of the cache"""
+
+    with _lock:
+        return dict(
+            _statistics,
+            entries=len(_entries),
+            max_size=MODEL_CACHE_SIZE * 1024 * 1024
+        )
+
+def _get(path, loader):
+    """Return the cached value of a file, loading it when missing or modified"""
+
+    status = os.stat(path)
+    version = (status.st_mtime_ns, status.st_size)
+
+    with _lock:
+        entry = _entries.get(path)
+        if entry is not None and entry[0] == version:
+            _entries.move_to_end(path)
+            _statistics['hits'] += 1
+            return entry[2]
+
+        _statistics['misses'] += 1
+
+    # Load outside of the lock so other models are still served meanwhile
+    value = loader(path)
+
+    with _lock:
+        if path in _entries:
+            _remove(path)
+
+        # The size on disk approximates the memory held by the unpickled model
+        if status.st_size <= MODEL_CACHE_SIZE * 1024 * 1024:
+            _entries[path] = (version, status.st_size, value)
+            _statistics['size'] += status.st_size
+
+            while _statistics['size'] > MODEL_CACHE_SIZE * 1024 * 1024:
+                _remove(next(iter(_entries)))
+                _statistics['evictions'] += 1
+
+    return value
+
+def _remove(path):
+    """Remove an entry, the lock must be held"""
+
+    _statistics['size'] -= _entries.pop(path)[1]
+
+def _load_json(path):
+    """Load a JSON file"""
+
+    with open(path) as json_file:
+        return json.load(json_file)
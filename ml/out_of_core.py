@@ -0,0 +1,68 @@
+"""
+Train on datasets too large to be copied around: the arrays of a job are
+memory mapped and shared between its processes, the search runs on a
+stratified sample of the training set and the best candidates are refit
+on every row (incrementally, a chunk at a time, when the estimator allows).
+"""
+
+import os
+from shutil import rmtree
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+# Define the number of training rows the hyper-parameter search is run on (0 searches every row)
+SEARCH_ROWS = int(os.getenv('SEARCH_ROWS', 0))
+
+# Define the size (in megabytes) above which the arrays of a job are memory mapped
+SHARED_ARRAY_SIZE = int(os.getenv('SHARED_ARRAY_SIZE', 64))
+
+# Define the number of rows an incremental estimator is refit on at a time
+REFIT_CHUNK_SIZE = int(os.getenv('REFIT_CHUNK_SIZE', 10000))
+
+def share_arrays(folder, arrays, size=SHARED_ARRAY_SIZE * 1024 * 1024):
+    """
+    Memory map the arrays larger than `size` bytes from `folder` so the pipeline
+    processes and their cross validation workers share them rather than copy them.
+    """
+
+    shared = []
+
+    for index, array in enumerate(arrays):
+        if isinstance(array, np.memmap) or array.nbytes <= size:
+            shared.append(array)
+            continue
+
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        np.save(folder + '/' + str(index) + '.npy', array)
+        shared.append(np.load(folder + '/' + str(index) + '.npy', mmap_mode='r'))
+
+    return shared
+
+def clear_shared_arrays(folder):
+    """Remove the memory mapped arrays of a job"""
+
+    rmtree(folder, ignore_errors=True)
+
+def sample_rows(x, y, rows=SEARCH_ROWS):
+    """Stratified sample of `rows` rows, all the rows when there are no more than `rows`"""
+
+    if not rows or len(x) <= rows:
+        return (x, y)
+
+    x_sample, _, y_sample, _ = train_test_split(x, y, train_size=rows, random_state=5, stratify=y)
+    return (x_sample, y_sample)
+
+def fit_incremental(model, x, y, transform=lambda x: x, chunk_size=REFIT_CHUNK_SIZE):
+    """Fit a model with `partial_fit`, transforming and fitting `chunk_size` rows at a time"""
+
+    y = np.asarray(y)
+    classes = np.unique(y)
+
+    for start in range(0, len(x), chunk_size):
+        model.partial_fit(
+            transform(x[start:start + chunk_size]), y[start:start + chunk_size], classes=classes)
+
+    return model
@@ -18,7 +18,11 @@ def generate_pipeline(
         scoring=None,
         searcher='grid',
         shuffle=True,
-        custom_hyper_parameters=None
+        custom_hyper_parameters=None,
+        n_jobs=-1,
+        memory=None,
+        history=None,
+        early_stopping=False
     ):
     """Generate the pipeline based on incoming arguments"""
 
@@ -30,6 +34,10 @@ def generate_pipeline(
     if feature_selector and FEATURE_SELECTORS[feature_selector]:
         steps.append(('feature_selector', FEATURE_SELECTORS[feature_selector]))
 
+    # Only the scaler and feature selector are worth caching
+    if not steps:
+        memory = None
+
     steps.append(('debug', Debug()))
 
     if not scoring:
@@ -39,8 +47,12 @@ def generate_pipeline(
     for scorer in scoring:
         scorers[scorer] = scorer
 
-    search_step = SEARCHERS[searcher](estimator, scorers, shuffle, custom_hyper_parameters, y_train)
+    search_step = SEARCHERS[searcher](
+        estimator, scorers, shuffle, custom_hyper_parameters, y_train,
+        n_jobs=n_jobs, history=history, early_stopping=early_stopping)
 
     steps.append(('estimator', search_step[0]))
 
-    return (Pipeline(steps), search_step[1])
+    # Fitted scaler and feature selector steps are cached and shared
+    # between pipelines with the same prefix when memory is provided.
+    return (Pipeline(steps, memory=memory), search_step[1])
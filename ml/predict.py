@@ -2,57 +2,124 @@
 Predicts outcome from incoming data against exported model
 """
 
-from joblib import load
+import os
+
 import pandas as pd
 import numpy as np
-import json
+
+from .evaluate import threshold_predictions
+from .model_registry import load_features, load_model
+
+# Define the number of rows scored at a time when streaming a file
+SCORE_CHUNK_SIZE = int(os.getenv('SCORE_CHUNK_SIZE', 10000))
 
 def predict(data, path='.', threshold=.5):
     """Predicts against the provided data"""
 
     # Load the pipeline
-    pipeline = load(path + '.joblib')
+    pipeline = load_model(path + '.joblib')
 
     data = pd.DataFrame(data).dropna().values
 
-    probability = pipeline.predict_proba(data)
-    if threshold == .5:
-      predicted = pipeline.predict(data)
-    else:
-      predicted = (probability[:, 1] >= threshold).astype(int)
+    return label_probabilities(pipeline.predict_proba(data), threshold)
+
+def predict_stream(file, path='.', threshold=.5, features=None, output_format='csv',
+                   chunk_size=SCORE_CHUNK_SIZE, header=True):
+    """
+    Predicts against a CSV file chunk by chunk, yielding the rows (along with
+    their prediction and probability) as CSV or newline delimited JSON.
+    The CSV header is left out when `header` is false (eg. for a continuation).
+    """
+
+    pipeline = load_model(path + '.joblib')
+
+    for chunk in pd.read_csv(file, chunksize=chunk_size):
+        chunk = chunk.dropna(subset=features)
+        if chunk.empty:
+            # The header is still written for a file without any row to score
+            if header and output_format != 'ndjson':
+                yield chunk.assign(prediction=[], probability=[]).to_csv(index=False)
+                header = False
+            continue
+
+        reply = label_probabilities(
+            pipeline.predict_proba((chunk[features] if features else chunk).to_numpy()), threshold)
+        chunk = chunk.assign(prediction=reply['predicted'], probability=reply['probability'])
+
+        if output_format == 'ndjson':
+            yield chunk.to_json(orient='records', lines=True).rstrip('\n') + '\n'
+        else:
+            yield chunk.to_csv(index=False, header=header)
+            header = False
+
+def label_probabilities(probabilities, threshold=.5):
+    """Label the probabilities and report the probability of each label"""
+
+    predicted = threshold_predictions(probabilities[:, 1], threshold)
 
     return {
         'predicted': predicted.tolist(),
-        'probability': [sublist[predicted[index]] for index, sublist in enumerate(probability.tolist())]
+        'probability': probabilities[np.arange(len(predicted)), predicted].tolist()
     }
 
-def predict_ensemble(total_models, data, path='.', vote_type='soft'):
-    """Predicts against the provided data by creating an ensemble of the selected models"""
+def ensemble_probabilities(total_models, data, path='.'):
+    """Probabilities of every model of the ensemble, stacked along the first axis"""
 
     probabilities = []
-    predictions = []
 
     for x in range(total_models):
-        pipeline = load(path + '/ensemble' + str(x) + '.joblib')
+        pipeline = load_model(path + '/ensemble' + str(x) + '.joblib')
+        features = load_features(path + '/ensemble' + str(x) + '_features.json')
 
-        with open(path + '/ensemble' + str(x) + '_features.json') as feature_file:
-            features = json.load(feature_file)
+        probabilities.append(pipeline.predict_proba(data[features].dropna().to_numpy()))
 
-        selected_data = data[features].dropna().to_numpy()
-        probabilities.append(pipeline.predict_proba(selected_data))
-        predictions.append(pipeline.predict(selected_data))
+    return np.asarray(probabilities)
 
-    predictions = np.asarray(predictions).T
-    probabilities = np.average(np.asarray(probabilities), axis=0)
+def vote(probabilities, vote_type='soft'):
+    """Combine the probabilities of the ensemble's models using a soft or hard vote"""
+
+    average = np.average(probabilities, axis=0)
 
     if vote_type == 'soft':
-        predicted = np.argmax(probabilities, axis=1)
+        predicted = np.argmax(average, axis=1)
     else:
-        predicted = np.apply_along_axis(
-            lambda x: np.argmax(np.bincount(x)), axis=1, arr=predictions.astype('int')
-        )
+        # Majority of the models' labels, ties are negative
+        votes = threshold_predictions(probabilities[:, :, 1]).sum(axis=0)
+        predicted = (2 * votes > len(probabilities)).astype(int)
 
     return {
         'predicted': predicted.tolist(),
-        'probability': [sublist[predicted[index]] for index, sublist in enumerate(probabilities.tolist())]
+        'probability': average[np.arange(len(predicted)), predicted].tolist()
+    }
+
+def predict_ensemble(total_models, data, path='.', vote_type='soft'):
+    """Predicts against the provided data by creating an ensemble of the selected models"""
+
+    return vote(ensemble_probabilities(total_models, data, path), vote_type)
+
+def predict_tandem(data, path='.'):
+    """Predicts against the provided data using the tandem NPV and PPV models"""
+
+    npv_features = load_features(path + '/tandem_npv_features.json')
+    ppv_features = load_features(path + '/tandem_ppv_features.json')
+
+    return combine_tandem(
+        predict(data[npv_features].to_numpy(), path + '/tandem_npv'),
+        predict(data[ppv_features].to_numpy(), path + '/tandem_ppv')
+    )
+
+def combine_tandem(npv_reply, ppv_reply):
+    """
+    Combine the replies of the tandem models, the negatives of the NPV model
+    are kept while its positives are labelled by the PPV model (its negatives
+    are reported as -1, an indeterminate result).
+    """
+
+    npv_predicted = np.asarray(npv_reply['predicted'])
+    ppv_predicted = np.asarray(ppv_reply['predicted'])
+    positive = npv_predicted > 0
+
+    return {
+        'predicted': np.where(positive, np.where(ppv_predicted > 0, ppv_predicted, -1), npv_predicted).tolist(),
+        'probability': np.where(positive, ppv_reply['probability'], npv_reply['probability']).tolist()
     }
@@ -0,0 +1,137 @@
+"""
+Cross validation which evaluates the candidates fold by fold and stops
+evaluating the candidates which are clearly beaten by the incumbents.
+"""
+
+import warnings
+from traceback import format_exc
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy.stats import rankdata, t
+from sklearn.base import clone, is_classifier
+from sklearn.exceptions import FitFailedWarning
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import GridSearchCV, ParameterGrid, check_cv
+from sklearn.utils import _safe_indexing
+
+# Define the number of folds every candidate is evaluated on before it may be pruned
+MIN_FOLDS = 3
+
+# Define the confidence required to consider a candidate worse than the incumbent
+CONFIDENCE = .95
+
+def race_candidates(estimator, candidates, X, y, cv, scoring, n_jobs=None):
+    """
+    Evaluate the candidates fold by fold and prune the candidates which,
+    for every scorer, are worse than the incumbent (the candidate with the
+    best mean score so far) based on the mean and variance of the differences
+    between their fold scores.
+
+    Returns the `cv_results_` (pruned candidates keep the scores of the folds
+    they were evaluated on and are ranked last) and the number of fits. A
+    candidate failing to fit scores nan on the fold, as with `error_score`,
+    and the search fails when every candidate failed on the first fold.
+    """
+
+    cv = check_cv(cv, y, classifier=is_classifier(estimator))
+    scorers = {name: get_scorer(scorer) for name, scorer in scoring.items()}
+    splits = list(cv.split(X, y))
+
+    scores = {name: np.full((len(candidates), len(splits)), np.nan) for name in scorers}
+    alive = np.ones(len(candidates), dtype=bool)
+    n_fits = 0
+
+    for split, (train, test) in enumerate(splits):
+        members = np.flatnonzero(alive)
+        fold_scores = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_and_score)(estimator, candidates[index], X, y, train, test, scorers)
+            for index in members
+        )
+        n_fits += len(members)
+
+        errors = [error for _, error in fold_scores if error is not None]
+        if errors and split == 0 and len(errors) == len(members):
+            raise ValueError('All the %d candidates failed to fit on the first fold:\n%s' % (len(members), errors[0]))
+        if errors:
+            warnings.warn('%d of the %d candidates failed to fit on fold %d, their score is set to nan:\n%s' % (
+                len(errors), len(members), split, errors[0]), FitFailedWarning)
+
+        for index, (candidate_scores, _) in zip(members, fold_scores):
+            for name in scorers:
+                scores[name][index, split] = candidate_scores[name]
+
+        if split + 1 >= MIN_FOLDS and split + 1 < len(splits):
+            alive[members] = ~_dominated(
+                {name: values[members, :split + 1] for name, values in scores.items()})
+
+    results = {'params': candidates, 'pruned': ~alive}
+    for name, values in scores.items():
+        for split in range(len(splits)):
+            results['split%d_test_%s' % (split, name)] = values[:, split]
+
+        means = np.nanmean(values, axis=1)
+        results['mean_test_%s' % name] = means
+        results['std_test_%s' % name] = np.nanstd(values, axis=1)
+        results['rank_test_%s' % name] = rank_candidates(means, alive)
+
+    return (results, n_fits)
+
+def rank_candidates(means, complete):
+    """Rank the candidates by mean score, the candidates evaluated on every fold first"""
+
+    means = -np.where(np.isnan(means), -np.inf, means)
+    ranks = np.empty(len(means), dtype=int)
+    ranks[complete] = rankdata(means[complete], method='min')
+    ranks[~complete] = complete.sum() + rankdata(means[~complete], method='min')
+
+    return ranks
+
+def _dominated(scores):
+    """Flag the candidates significantly worse than the incumbent of every scorer"""
+
+    dominated = None
+
+    for values in scores.values():
+        n_folds = values.shape[1]
+        failed = np.isnan(values).any(axis=1)
+        means = np.where(failed, -np.inf, values.mean(axis=1))
+        incumbent = values[np.argmax(means)]
+
+        differences = values - incumbent
+        bound = differences.mean(axis=1) +\
+            t.ppf(CONFIDENCE, n_folds - 1) * differences.std(axis=1, ddof=1) / np.sqrt(n_folds)
+        worse = failed | (bound < 0)
+
+        dominated = worse if dominated is None else dominated & worse
+
+    return dominated
+
+def _fit_and_score(estimator, params, X, y, train, test, scorers):
+    """
+    Fit a candidate on the training fold and score it on the test fold, returning its
+    scores along with the error of a failed fit (reported by the caller, warnings
+    raised within the workers of a pool are lost)
+    """
+
+    x_test = _safe_indexing(X, test)
+    y_test = _safe_indexing(y, test)
+
+    try:
+        model = clone(estimator).set_params(**params).fit(_safe_indexing(X, train), _safe_indexing(y, train))
+    except Exception:
+        return ({name: np.nan for name in scorers}, format_exc())
+
+    return ({name: scorer(model, x_test, y_test) for name, scorer in scorers.items()}, None)
+
+class EarlyStoppingGridSearchCV(GridSearchCV):
+    """Grid search evaluating its candidates with early stopped cross validation"""
+
+    def fit(self, X, y=None, **fit_params):
+        """Race the candidates of the grid"""
+
+        self.cv_results_, self.n_fits_ = race_candidates(
+            self.estimator, list(ParameterGrid(self.param_grid)), X, y, self.cv, self.scoring, self.n_jobs)
+        self.n_splits_ = self.cv.get_n_splits(X, y)
+
+        return self
@@ -17,9 +17,13 @@ ESTIMATORS = {
     'mlp': MLPClassifier(),
     'nb': GaussianNB(),
     'rf': RandomForestClassifier(n_estimators=10),
-    'svm': SVC(gamma='auto', probability=True),
+    'svm': SVC(gamma='auto', probability=True, random_state=0),
 }
 
+# Estimators refit a chunk at a time (with `partial_fit`) on large training sets,
+# the neural network is not as each call of its `partial_fit` is a single epoch
+INCREMENTAL_ESTIMATORS = ['nb']
+
 ESTIMATOR_NAMES = {
     'gb': 'gradient boosting machine',
     'knn': 'K-nearest neighbor',
@@ -0,0 +1,199 @@
+"""
+Successive halving and Hyperband searches which spend their resources
+(training samples or number of estimators) on the most promising candidates.
+"""
+
+from math import ceil
+
+import numpy as np
+from sklearn.base import is_classifier
+from sklearn.model_selection import ParameterGrid, ParameterSampler, check_cv, train_test_split
+from sklearn.model_selection._search import BaseSearchCV
+from sklearn.utils import check_random_state
+
+class SubsampleSplitter:
+    """Cross validator which trains on a stratified subsample of each training fold"""
+
+    def __init__(self, cv, fraction, random_state=None):
+        self.cv = cv
+        self.fraction = fraction
+        self.random_state = random_state
+
+    def split(self, X, y=None, groups=None):
+        """Generate the subsampled train and the complete test indices"""
+
+        y = np.asarray(y)
+        n_classes = len(np.unique(y))
+
+        for train, test in self.cv.split(X, y, groups):
+            size = int(round(len(train) * self.fraction))
+
+            if size < len(train) - n_classes:
+                train = train_test_split(
+                    train,
+                    train_size=max(size, n_classes),
+                    stratify=y[train],
+                    random_state=self.random_state
+                )[0]
+
+            yield (train, test)
+
+    def get_n_splits(self, X=None, y=None, groups=None):
+        """Number of splits of the wrapped cross validator"""
+
+        return self.cv.get_n_splits(X, y, groups)
+
+class HalvingSearchCV(BaseSearchCV):
+    """
+    Successive halving over either the complete parameter grid (when
+    `n_candidates` is None) or `n_candidates` sampled parameters.
+
+    Unlike the scikit-learn implementation, every scorer is evaluated so
+    candidates can be ranked for each of them. Candidates are promoted based
+    on the `promote` scorer and the candidates evaluated with the most
+    resources are ranked first.
+    """
+
+    def __init__(self, estimator, param_distributions, *, n_candidates=None, scoring=None,
+                 promote=None, resource='n_samples', min_resources=1, max_resources=1,
+                 factor=3, n_jobs=None, cv=None, random_state=None):
+        super().__init__(
+            estimator,
+            scoring=scoring,
+            n_jobs=n_jobs,
+            refit=False,
+            cv=cv,
+            return_train_score=False
+        )
+        self.param_distributions = param_distributions
+        self.n_candidates = n_candidates
+        self.promote = promote
+        self.resource = resource
+        self.min_resources = min_resources
+        self.max_resources = max_resources
+        self.factor = factor
+        self.random_state = random_state
+
+    def schedule(self):
+        """List of brackets, each a list of `(candidates, resources)` iterations"""
+
+        n_candidates = self._count_candidates(self.n_candidates)
+        iterations = 1
+
+        # Halve until the last iteration would keep less than two candidates
+        # (two models are refit per scorer) or run out of resources
+        while ceil(n_candidates / self.factor ** iterations) >= 2 and\
+            self.max_resources // self.factor ** iterations >= self.min_resources:
+            iterations += 1
+
+        return [[
+            (
+                ceil(n_candidates / self.factor ** iteration),
+                self.max_resources // self.factor ** (iterations - 1 - iteration)
+            ) for iteration in range(iterations)
+        ]]
+
+    def fit(self, X, y=None, **fit_params):
+        """Run the search and rank the candidates by resources and score"""
+
+        self._checked_cv = check_cv(self.cv, y, classifier=is_classifier(self.estimator))
+        super().fit(X, y, **fit_params)
+
+        resources = np.asarray(self.cv_results_['n_resources'])
+        for scorer in self._scorer_names():
+            means = np.asarray(self.cv_results_['mean_test_%s' % scorer], dtype=float)
+            order = np.lexsort((-np.where(np.isnan(means), -np.inf, means), -resources))
+            ranks = np.empty(len(order), dtype=int)
+            ranks[order] = np.arange(1, len(order) + 1)
+            self.cv_results_['rank_test_%s' % scorer] = ranks
+
+        return self
+
+    def _run_search(self, evaluate_candidates):
+        """Evaluate each bracket, keeping the best candidates of every iteration"""
+
+        promote = self.promote or self._scorer_names()[0]
+        random_state = check_random_state(self.random_state)
+
+        for bracket, iterations in enumerate(self.schedule()):
+            candidates = self._sample_candidates(iterations[0][0], random_state)
+
+            for iteration, (n_candidates, n_resources) in enumerate(iterations):
+                candidates = candidates[:n_candidates]
+
+                if self.resource == 'n_samples':
+                    cv = SubsampleSplitter(
+                        self._checked_cv, n_resources / self.max_resources, self.random_state)
+                else:
+                    cv = self._checked_cv
+                    candidates = [dict(params, **{self.resource: n_resources}) for params in candidates]
+
+                results = evaluate_candidates(candidates, cv, more_results={
+                    'bracket': [bracket] * len(candidates),
+                    'iter': [iteration] * len(candidates),
+                    'n_resources': [n_resources] * len(candidates)
+                })
+
+                # Order the candidates of this iteration from best to worst
+                scores = np.asarray(results['mean_test_%s' % promote][-len(candidates):], dtype=float)
+                order = np.argsort(-np.where(np.isnan(scores), -np.inf, scores), kind='stable')
+                candidates = [candidates[index] for index in order]
+
+    def _count_candidates(self, requested):
+        """Number of candidates available in the parameter space"""
+
+        try:
+            total = len(ParameterGrid(self.param_distributions))
+        except Exception:
+            total = None
+
+        if requested is None:
+            return total
+
+        return min(requested, total) if total is not None else requested
+
+    def _sample_candidates(self, n_candidates, random_state):
+        """Sample the candidates of a bracket"""
+
+        if self.n_candidates is None:
+            return list(ParameterGrid(self.param_distributions))
+
+        return list(ParameterSampler(self.param_distributions, n_candidates, random_state=random_state))
+
+    def _scorer_names(self):
+        """Names of the scorers present in `cv_results_`"""
+
+        return list(self.scoring) if isinstance(self.scoring, dict) else ['score']
+
+class HyperbandSearchCV(HalvingSearchCV):
+    """
+    Hyperband search, running several successive halving brackets which
+    trade the number of sampled candidates against their starting resources.
+    The candidates of each bracket are always sampled.
+    """
+
+    def schedule(self):
+        """List of brackets, each a list of `(candidates, resources)` iterations"""
+
+        max_bracket = 0
+        while self.max_resources // self.factor ** (max_bracket + 1) >= self.min_resources:
+            max_bracket += 1
+
+        brackets = []
+        for bracket in range(max_bracket, -1, -1):
+            n_candidates = self._count_candidates(
+                ceil((max_bracket + 1) / (bracket + 1) * self.factor ** bracket))
+
+            brackets.append([
+                (
+                    max(1, n_candidates // self.factor ** iteration),
+                    self.max_resources // self.factor ** (bracket - iteration)
+                ) for iteration in range(bracket + 1)
+            ])
+
+        return brackets
+
+    def _sample_candidates(self, n_candidates, random_state):
+        """Sample the candidates of a bracket"""
+
+        return list(ParameterSampler(self.param_distributions, n_candidates, random_state=random_state))
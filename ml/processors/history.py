@@ -0,0 +1,269 @@
+"""
+Job level history of the hyper-parameters evaluated by a search
+and a random search which only samples unvisited parameters (or, for
+continuous distributions, unvisited regions of the parameter space).
+"""
+
+import json
+import os
+from glob import glob
+
+import numpy as np
+from joblib import dump, load
+from sklearn.model_selection import ParameterGrid, ParameterSampler, RandomizedSearchCV
+
+from .early_stopping import race_candidates, rank_candidates
+
+# Define how many samples are drawn per candidate before giving up on unvisited parameters
+MAX_SAMPLING_ATTEMPTS = 10
+
+# Define the number of quantile bins each continuous parameter is divided into, a search building
+# upon the history only samples the regions (combinations of bins and discrete values) not visited
+REGION_BINS = 10
+
+# Define how many earlier jobs on the same dataset are used to warm start a search
+WARM_START_JOBS = int(os.getenv('WARM_START_JOBS', 5))
+
+class SearchHistory:
+    """
+    Evaluated parameters and their fold scores for a given pipeline prefix
+    and searcher, `warm_start` lists the history locations of earlier jobs.
+
+    Searchers sharing a history (eg. the second random search) record their
+    entries under their own `source`, a searcher run again (a resumed job or
+    a redelivered task) replaces its earlier entries rather than adding to them.
+    """
+
+    def __init__(self, location, prefix, searcher, warm_start=(), source=None):
+        self.location = location
+        self.prefix = prefix
+        self.searcher = searcher
+        self.warm_start = warm_start
+        self.source = source or searcher
+
+    @property
+    def path(self):
+        """Path of the file holding the history"""
+
+        return self.location + '/' + self.prefix + '__' + self.searcher + '.joblib'
+
+    def load(self):
+        """Load the parameters previously evaluated by the other sources of the history"""
+
+        if not os.path.exists(self.path):
+            return []
+
+        return [entry for entry in load(self.path) if entry.get('source', self.searcher) != self.source]
+
+    def append(self, entries):
+        """Record newly evaluated parameters, in place of those of an earlier run of the same source"""
+
+        if not entries:
+            return
+
+        if not os.path.exists(self.location):
+            os.makedirs(self.location, exist_ok=True)
+
+        # Write to a temporary file first so readers never see a partial file
+        temporary_path = self.path + '.' + str(os.getpid())
+        dump(self.load() + [dict(entry, source=self.source) for entry in entries], temporary_path)
+        os.replace(temporary_path, self.path)
+
+    def load_warm_start(self):
+        """Load the parameters evaluated by any searcher of earlier jobs for the same prefix"""
+
+        entries = []
+        for location in self.warm_start:
+            for path in sorted(glob(location + '/' + self.prefix + '__*.joblib')):
+                entries += load(path)
+
+        return entries
+
+def find_warm_start(output_path, max_jobs=WARM_START_JOBS):
+    """History locations of the latest completed jobs trained on the same dataset"""
+
+    if max_jobs <= 0 or not os.path.exists(output_path + '/metadata.json'):
+        return []
+
+    with open(output_path + '/metadata.json') as metafile:
+        datasetid = json.load(metafile).get('datasetid')
+
+    if datasetid is None:
+        return []
+
+    jobs = []
+    folder = os.path.dirname(os.path.abspath(output_path))
+    for job in os.listdir(folder):
+        job_folder = folder + '/' + job
+        if os.path.samefile(job_folder, output_path) or\
+            not os.path.exists(job_folder + '/history') or\
+            not os.path.exists(job_folder + '/metadata.json'):
+            continue
+
+        with open(job_folder + '/metadata.json') as metafile:
+            try:
+                metadata = json.load(metafile)
+            except ValueError:
+                continue
+
+        # Only completed jobs have a date
+        if metadata.get('datasetid') == datasetid and 'date' in metadata:
+            jobs.append((metadata['date'], job_folder + '/history'))
+
+    return [location for _, location in sorted(jobs, reverse=True)[:max_jobs]]
+
+def parameter_key(params):
+    """Hashable representation of a parameter set"""
+
+    return repr(sorted((name, repr(value)) for name, value in params.items()))
+
+def parameter_region(params, param_distributions):
+    """
+    Hashable region of the parameter space a parameter set falls in, the
+    values of continuous (or large discrete) distributions are replaced by
+    their quantile bin so neighbouring values share a region.
+    """
+
+    distributions = param_distributions
+    if isinstance(param_distributions, list):
+        distributions = next(
+            (item for item in param_distributions if set(item) == set(params)), param_distributions[0])
+
+    return repr(sorted(
+        (name, int(min(distributions[name].cdf(value) * REGION_BINS, REGION_BINS - 1))
+         if hasattr(distributions.get(name), 'cdf') else repr(value))
+        for name, value in params.items()
+    ))
+
+def results_to_history(cv_results, scorers, n_splits):
+    """Convert the `cv_results_` of a search to history entries"""
+
+    return [
+        {
+            'params': params,
+            'scores': {
+                scorer: [cv_results['split%d_test_%s' % (split, scorer)][index] for split in range(n_splits)]
+                for scorer in scorers
+            }
+        } for index, params in enumerate(cv_results['params'])
+    ]
+
+def history_to_results(entries, scorers):
+    """Build `cv_results_` from history entries"""
+
+    results = {'params': [entry['params'] for entry in entries]}
+
+    for scorer in scorers:
+        scores = np.array([entry['scores'][scorer] for entry in entries], dtype=float)
+        means = np.nanmean(scores, axis=1)
+
+        for split in range(scores.shape[1]):
+            results['split%d_test_%s' % (split, scorer)] = scores[:, split]
+
+        results['mean_test_%s' % scorer] = means
+        results['std_test_%s' % scorer] = np.nanstd(scores, axis=1)
+
+        # Candidates pruned by early stopping are ranked last
+        results['rank_test_%s' % scorer] = rank_candidates(means, ~np.isnan(scores).any(axis=1))
+
+    return results
+
+class HistoryRandomizedSearchCV(RandomizedSearchCV):
+    """
+    Randomized search which skips the parameters already recorded in the
+    history (the regions they fall in for continuous distributions), and
+    reuses the recorded scores once every parameter was visited. With
+    `early_stopping`, the candidates are raced fold by fold. An integer
+    `random_state` is offset by the size of the history (as left by the other
+    sources) so a search building upon another samples differently, and
+    reproducibly.
+    """
+
+    def __init__(self, estimator, param_distributions, *, n_iter=10, scoring=None,
+                 n_jobs=None, cv=None, random_state=None, history=None, early_stopping=False):
+        super().__init__(
+            estimator,
+            param_distributions,
+            n_iter=n_iter,
+            scoring=scoring,
+            n_jobs=n_jobs,
+            refit=False,
+            cv=cv,
+            random_state=random_state,
+            return_train_score=False
+        )
+        self.history = history
+        self.early_stopping = early_stopping
+
+    def fit(self, X, y=None, **fit_params):
+        """Evaluate the unvisited parameters and record them"""
+
+        entries = self.history.load() if self.history is not None else []
+        self.candidates_ = self._sample_candidates(entries)
+
+        if not self.candidates_ and entries:
+            print('\tAll parameters were previously evaluated, reusing their scores')
+            self.cv_results_ = history_to_results(entries, self.scoring)
+            self.n_fits_ = 0
+            return self
+
+        if self.early_stopping:
+            self.cv_results_, self.n_fits_ = race_candidates(
+                self.estimator, self.candidates_, X, y, self.cv, self.scoring, self.n_jobs)
+            self.n_splits_ = self.cv.get_n_splits(X, y)
+        else:
+            super().fit(X, y, **fit_params)
+            self.n_fits_ = len(self.candidates_) * self.n_splits_
+
+        if self.history is not None:
+            self.history.append(results_to_history(self.cv_results_, self.scoring, self.n_splits_))
+
+        return self
+
+    def _run_search(self, evaluate_candidates):
+        """Search the sampled candidates"""
+
+        evaluate_candidates(self.candidates_)
+
+    def _sample_candidates(self, entries):
+        """Sample up to `n_iter` parameters which were not visited by the history `entries`"""
+
+        if isinstance(self.random_state, np.random.RandomState):
+            random_state = self.random_state
+        else:
+            random_state = np.random.RandomState(
+                self.random_state + len(entries) if self.random_state is not None else None)
+
+        visited = {parameter_key(entry['params']) for entry in entries}
+
+        # Exhaustive lists can be filtered directly, when the grid contains
+        # an RVS method the parameter grid throws an error instead.
+        try:
+            grid = [params for params in ParameterGrid(self.param_distributions)
+                    if parameter_key(params) not in visited]
+            if len(grid) <= self.n_iter:
+                return grid
+            return [grid[index] for index in random_state.choice(len(grid), self.n_iter, replace=False)]
+        except Exception:
+            pass
+
+        # Distributions are sampled until enough parameters are found outside the visited regions,
+        # a search building upon the history samples each region left once (so its budget shrinks)
+        regions = {parameter_region(entry['params'], self.param_distributions) for entry in entries}
+        candidates = []
+        for params in ParameterSampler(
+                self.param_distributions, self.n_iter * MAX_SAMPLING_ATTEMPTS, random_state=random_state):
+            key = parameter_key(params)
+            region = parameter_region(params, self.param_distributions)
+            if key in visited or region in regions:
+                continue
+
+            visited.add(key)
+            if entries:
+                regions.add(region)
+            candidates.append(params)
+
+            if len(candidates) == self.n_iter:
+                break
+
+        return candidates
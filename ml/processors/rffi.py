@@ -3,7 +3,7 @@ Implements Random Forest Feature Importance as a pipeline step
 """
 
 from decimal import Decimal, ROUND_HALF_UP
-from sklearn.base import TransformerMixin, BaseEstimator
+from sklearn.base import TransformerMixin, BaseEstimator, clone
 
 from .estimators import ESTIMATORS
 
@@ -11,7 +11,7 @@ class RandomForestFeatureImportanceSelector(BaseEstimator, TransformerMixin):
     """Pipeline step class"""
 
     def __init__(self, percentile=.8):
-        self.model = ESTIMATORS['rf']
+        self.model = clone(ESTIMATORS['rf'])
         self.percentile = percentile
         self.total = 1
 
@@ -4,63 +4,135 @@ All hyper-parameter search methods
 
 import pandas as pd
 
-from sklearn.model_selection import GridSearchCV, ParameterGrid, RandomizedSearchCV, StratifiedKFold
+from sklearn.model_selection import GridSearchCV, ParameterGrid, StratifiedKFold
 
+from .early_stopping import EarlyStoppingGridSearchCV
 from .estimators import ESTIMATORS
+from .halving import HalvingSearchCV, HyperbandSearchCV
+from .history import HistoryRandomizedSearchCV
 from .hyperparameters import HYPER_PARAMETER_RANGE
+from .tpe import TPESearchCV
 
 # Define the max iterations for random
 MAX_RANDOM_ITERATIONS = 100
 
+# Define the seed of the random searches, so a job run again samples the same parameters
+RANDOM_SEED = 0
+
 # Define the number of splits for the cross validator
 N_SPLITS = 10
 
-def make_grid_search(estimator, scoring, shuffle, custom_hyper_parameters, _):
-    """Generate grid search with 10 fold cross validator"""
+# Define the max iterations for the bayesian search, the first iterations
+# are random (or the best parameters of earlier jobs) and the others are
+# proposed a batch at a time
+BAYES_ITERATIONS = 30
+BAYES_STARTUP = 10
+BAYES_BATCH_SIZE = 5
+
+# Define the rate at which successive halving discards candidates
+HALVING_FACTOR = 3
+
+# Define the resource successive halving increases for each estimator (default: samples)
+HALVING_RESOURCES = {
+    'gb': 'n_estimators',
+    'rf': 'n_estimators'
+}
+
+# Define the bounds when the number of estimators is the resource
+MIN_ESTIMATORS = 10
+MAX_ESTIMATORS = 1000
+
+def get_parameter_range(kind, estimator, custom_hyper_parameters, y_train=None):
+    """Get the custom or default hyper-parameter range for the estimator"""
+
+    if custom_hyper_parameters is not None and\
+        kind in custom_hyper_parameters and\
+        estimator in custom_hyper_parameters[kind]:
+        parameter_range = custom_hyper_parameters[kind][estimator]
+    else:
+        parameter_range = HYPER_PARAMETER_RANGE[kind][estimator]\
+            if estimator in HYPER_PARAMETER_RANGE[kind] else {}
+
+    if callable(parameter_range):
+        parameter_range = parameter_range(pd.Series(y_train).value_counts().min())
+
+    return parameter_range
+
+def get_halving_resource(estimator, parameter_range, y_train):
+    """
+    Determine the resource, its bounds and the remaining parameter range
+    used by successive halving for the estimator.
+    """
+
+    resource = HALVING_RESOURCES.get(estimator, 'n_samples')
+
+    if resource == 'n_samples':
+        # Each fold must contain at least a couple of cases of every class
+        return (
+            resource,
+            N_SPLITS * 2 * pd.Series(y_train).nunique(),
+            len(y_train),
+            parameter_range
+        )
+
+    ranges = parameter_range if isinstance(parameter_range, list) else [parameter_range]
+    max_resources = MAX_ESTIMATORS
+    for item in ranges:
+        values = item.get(resource)
+        if isinstance(values, (list, tuple, range)):
+            max_resources = max(values)
+        elif hasattr(values, 'support'):
+            max_resources = int(values.support()[1])
+
+    ranges = [{k: v for k, v in item.items() if k != resource} for item in ranges]
+
+    return (
+        resource,
+        MIN_ESTIMATORS,
+        max_resources,
+        ranges if isinstance(parameter_range, list) else ranges[0]
+    )
+
+#pylint: disable = unused-argument
+def make_grid_search(estimator, scoring, shuffle, custom_hyper_parameters, _, n_jobs=-1, history=None,
+                     early_stopping=False):
+    """
+    Generate grid search with 10 fold cross validator, with early stopping
+    the candidates clearly beaten after a few folds are not evaluated further.
+    """
 
     # Define the cross validator (shuffle the data between each fold)
     # This reduces correlation between outcome and train data order.
     cv = StratifiedKFold(n_splits=N_SPLITS, shuffle=shuffle)
 
-    if custom_hyper_parameters is not None and\
-        'grid' in custom_hyper_parameters and\
-        estimator in custom_hyper_parameters['grid']:
-        parameter_range = custom_hyper_parameters['grid'][estimator]
-    else:
-        parameter_range = HYPER_PARAMETER_RANGE['grid'][estimator]\
-            if estimator in HYPER_PARAMETER_RANGE['grid'] else {}
+    parameter_range = get_parameter_range('grid', estimator, custom_hyper_parameters)
 
     return (
-        GridSearchCV(
+        (EarlyStoppingGridSearchCV if early_stopping else GridSearchCV)(
             ESTIMATORS[estimator],
             parameter_range,
             cv=cv,
             scoring=scoring,
             refit=False,
-            n_jobs=-1,
+            n_jobs=n_jobs,
             return_train_score=False
         ),
         len(list(ParameterGrid(parameter_range))) *\
             cv.get_n_splits()
     )
 
-def make_random_search(estimator, scoring, shuffle, custom_hyper_parameters, y_train):
-    """Generate random search with defined max iterations"""
+def make_random_search(estimator, scoring, shuffle, custom_hyper_parameters, y_train, n_jobs=-1, history=None,
+                       early_stopping=False):
+    """
+    Generate random search with defined max iterations, parameters already
+    present in the history of the pipeline prefix are not sampled again.
+    """
 
     # Define the cross validator (shuffle the data between each fold)
     # This reduces correlation between outcome and train data order.
     cv = StratifiedKFold(n_splits=N_SPLITS, shuffle=shuffle)
 
-    if custom_hyper_parameters is not None and\
-        'random' in custom_hyper_parameters and\
-        estimator in custom_hyper_parameters['random']:
-        parameter_range = custom_hyper_parameters['random'][estimator]
-    else:
-        parameter_range = HYPER_PARAMETER_RANGE['random'][estimator]\
-            if estimator in HYPER_PARAMETER_RANGE['random'] else {}
-
-    if callable(parameter_range):
-        parameter_range = parameter_range(pd.Series(y_train).value_counts().min())
+    parameter_range = get_parameter_range('random', estimator, custom_hyper_parameters, y_train)
 
     # When the grid contains an RVS method, the parameter grid cannot generate
     # an exhaustive list and throws an error. In this case, iterate the max
@@ -72,27 +144,137 @@ def make_random_search(estimator, scoring, shuffle, custom_hyper_parameters, y_t
         iterations = MAX_RANDOM_ITERATIONS
 
     return (
-        RandomizedSearchCV(
+        HistoryRandomizedSearchCV(
             ESTIMATORS[estimator],
             parameter_range,
             cv=cv,
             scoring=scoring,
-            refit=False,
             n_iter=iterations,
-            n_jobs=-1,
-            return_train_score=False
+            n_jobs=n_jobs,
+            random_state=RANDOM_SEED,
+            history=history,
+            early_stopping=early_stopping
+        ),
+        iterations * cv.get_n_splits()
+    )
+
+def make_bayes_search(estimator, scoring, shuffle, custom_hyper_parameters, y_train, n_jobs=-1, history=None,
+                      early_stopping=False):
+    """
+    Generate a TPE based bayesian search over the random hyper-parameter
+    range, warm started with the history of earlier jobs on the same dataset.
+    """
+
+    # Define the cross validator (shuffle the data between each fold)
+    # This reduces correlation between outcome and train data order.
+    cv = StratifiedKFold(n_splits=N_SPLITS, shuffle=shuffle)
+
+    parameter_range = get_parameter_range('random', estimator, custom_hyper_parameters, y_train)
+
+    try:
+        total_range = len(list(ParameterGrid(parameter_range)))
+        iterations = min(total_range, BAYES_ITERATIONS)
+    except Exception:
+        iterations = BAYES_ITERATIONS
+
+    return (
+        TPESearchCV(
+            ESTIMATORS[estimator],
+            parameter_range,
+            n_iter=iterations,
+            n_startup=BAYES_STARTUP,
+            batch_size=BAYES_BATCH_SIZE,
+            scoring=scoring,
+            objective='roc_auc' if 'roc_auc' in scoring else None,
+            warm_start=history.load_warm_start() if history is not None else None,
+            n_jobs=n_jobs,
+            cv=cv,
+            history=history
         ),
         iterations * cv.get_n_splits()
     )
 
+def make_halving_grid_search(estimator, scoring, shuffle, custom_hyper_parameters, y_train, n_jobs=-1, history=None,
+                             early_stopping=False):
+    """Generate successive halving over the complete grid"""
+
+    parameter_range = get_parameter_range('grid', estimator, custom_hyper_parameters)
+    return make_halving_search(HalvingSearchCV, None, estimator, scoring, shuffle, parameter_range, y_train, n_jobs)
+
+def make_halving_random_search(estimator, scoring, shuffle, custom_hyper_parameters, y_train, n_jobs=-1, history=None,
+                               early_stopping=False):
+    """Generate successive halving over the max random iterations"""
+
+    parameter_range = get_parameter_range('random', estimator, custom_hyper_parameters, y_train)
+    return make_halving_search(
+        HalvingSearchCV, MAX_RANDOM_ITERATIONS, estimator, scoring, shuffle, parameter_range, y_train, n_jobs)
+
+def make_hyperband_search(estimator, scoring, shuffle, custom_hyper_parameters, y_train, n_jobs=-1, history=None,
+                          early_stopping=False):
+    """Generate Hyperband search over the random hyper-parameter range"""
+
+    parameter_range = get_parameter_range('random', estimator, custom_hyper_parameters, y_train)
+    return make_halving_search(
+        HyperbandSearchCV, MAX_RANDOM_ITERATIONS, estimator, scoring, shuffle, parameter_range, y_train, n_jobs)
+
+def make_halving_search(search_class, n_candidates, estimator, scoring, shuffle, parameter_range, y_train, n_jobs):
+    """Generate a successive halving based search and the number of fits it performs"""
+
+    # Define the cross validator (shuffle the data between each fold)
+    # This reduces correlation between outcome and train data order.
+    cv = StratifiedKFold(n_splits=N_SPLITS, shuffle=shuffle)
+
+    resource, min_resources, max_resources, parameter_range = \
+        get_halving_resource(estimator, parameter_range, y_train)
+
+    search = search_class(
+        ESTIMATORS[estimator],
+        parameter_range,
+        n_candidates=n_candidates,
+        scoring=scoring,
+        promote='roc_auc' if 'roc_auc' in scoring else None,
+        resource=resource,
+        min_resources=min_resources,
+        max_resources=max_resources,
+        factor=HALVING_FACTOR,
+        n_jobs=n_jobs,
+        cv=cv
+    )
+
+    return (
+        search,
+        sum(n for bracket in search.schedule() for n, _ in bracket) * cv.get_n_splits()
+    )
+
 SEARCHERS = {
     'grid': make_grid_search,
     'random': make_random_search,
-    'random2': make_random_search
+    'random2': make_random_search,
+    'bayes': make_bayes_search,
+    'halving-grid': make_halving_grid_search,
+    'halving-random': make_halving_random_search,
+    'hyperband': make_hyperband_search
+}
+
+# Searchers which must wait for another searcher of the same pipeline prefix
+# and share its history (the second random search only samples what the
+# first one did not visit)
+SEARCHER_DEPENDENCIES = {
+    'random2': 'random'
 }
 
 SEARCHER_NAMES = {
     'grid': 'grid search',
     'random': 'random search',
-    'random2': '2nd random search'
+    'random2': '2nd random search',
+    'bayes': 'bayesian search',
+    'halving-grid': 'successive halving grid search',
+    'halving-random': 'successive halving random search',
+    'hyperband': 'hyperband search'
 }
+
+# Define the searchers a job only runs when it opts in (they are ignored unless `ignore_searcher` is set)
+OPT_IN_SEARCHERS = ['bayes', 'halving-grid', 'halving-random', 'hyperband']
+
+# Define the searchers ignored when a job does not set `ignore_searcher`
+DEFAULT_IGNORE_SEARCHER = ','.join(OPT_IN_SEARCHERS)
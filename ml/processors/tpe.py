@@ -0,0 +1,313 @@
+"""
+Tree-structured Parzen estimator (TPE) search which proposes candidates
+sequentially based on the scores of the candidates evaluated so far,
+optionally warm started with the history of earlier jobs.
+"""
+
+from math import ceil
+from numbers import Number
+
+import numpy as np
+from scipy.stats import norm, truncnorm
+from sklearn.model_selection import ParameterSampler
+from sklearn.model_selection._search import BaseSearchCV
+from sklearn.utils import check_random_state
+
+from .history import parameter_key, results_to_history
+
+# Define the fraction of the observations modelling the good candidates
+GAMMA = .25
+
+# Define how many samples of the good density are scored per proposed candidate
+N_EI_CANDIDATES = 24
+
+# Define how many times a proposal is drawn before giving up on unvisited parameters
+MAX_PROPOSAL_ATTEMPTS = 10
+
+class Dimension:
+    """
+    Hyper-parameter mapped to the unit interval, distributions use their
+    quantiles and numeric lists the position of their values.
+    """
+
+    def __init__(self, values, categorical=None):
+        self.values = values
+        self.distribution = hasattr(values, 'rvs')
+        self.discrete = self.distribution and hasattr(getattr(values, 'dist', None), 'pmf')
+        self.categorical = categorical if categorical is not None else not self.distribution and not all(
+            isinstance(value, Number) and not isinstance(value, bool) for value in values)
+
+        if not self.distribution:
+            self.values = list(values)
+
+    def encode(self, value):
+        """Map a value to the unit interval (or a category index), None when unknown"""
+
+        if self.distribution:
+            if self.discrete:
+                return float(np.clip((self.values.cdf(value - 1) + self.values.cdf(value)) / 2, 0, 1))
+            return float(np.clip(self.values.cdf(value), 0, 1))
+
+        keys = [repr(item) for item in self.values]
+        if repr(value) not in keys:
+            return None
+
+        index = keys.index(repr(value))
+        return index if self.categorical else (index + .5) / len(self.values)
+
+    def decode(self, point):
+        """Map a point of the unit interval (or a category index) back to a value"""
+
+        if self.categorical:
+            return self.values[int(point)]
+
+        point = float(np.clip(point, 1e-6, 1 - 1e-6))
+
+        if self.distribution:
+            value = self.values.ppf(point)
+            return int(value) if self.discrete else value
+
+        return self.values[min(int(point * len(self.values)), len(self.values) - 1)]
+
+class Density:
+    """Parzen estimator of the observed points of a dimension, mixed with its prior"""
+
+    def __init__(self, dimension, points):
+        self.dimension = dimension
+        self.points = np.asarray(points, dtype=float)
+
+        if dimension.categorical:
+            counts = np.bincount(self.points.astype(int), minlength=len(dimension.values))
+            self.probabilities = (counts + 1) / (counts.sum() + len(dimension.values))
+        elif len(self.points):
+            self.bandwidth = max(
+                1.06 * np.std(self.points) * len(self.points) ** -.2,
+                .5 / (len(self.points) + 1)
+            )
+
+    def sample(self, size, random_state):
+        """Draw points from the density"""
+
+        if self.dimension.categorical:
+            return random_state.choice(len(self.probabilities), size, p=self.probabilities)
+
+        # The first component is the (uniform) prior
+        components = random_state.randint(0, len(self.points) + 1, size)
+        samples = random_state.uniform(size=size)
+
+        members = np.flatnonzero(components)
+        if len(members):
+            means = self.points[components[members] - 1]
+            samples[members] = truncnorm.rvs(
+                -means / self.bandwidth,
+                (1 - means) / self.bandwidth,
+                loc=means,
+                scale=self.bandwidth,
+                size=len(members),
+                random_state=random_state
+            )
+
+        return samples
+
+    def log_pdf(self, samples):
+        """Log density of the points"""
+
+        if self.dimension.categorical:
+            return np.log(self.probabilities[samples.astype(int)])
+
+        if not len(self.points):
+            return np.zeros(len(samples))
+
+        means = self.points[np.newaxis, :]
+        mass = norm.cdf((1 - means) / self.bandwidth) - norm.cdf(-means / self.bandwidth)
+        kernels = norm.pdf((samples[:, np.newaxis] - means) / self.bandwidth) / self.bandwidth / mass
+
+        return np.log((1 + kernels.sum(axis=1)) / (len(self.points) + 1))
+
+class TPESearchCV(BaseSearchCV):
+    """
+    Search evaluating `n_startup` candidates (the best candidates of the warm
+    start followed by random candidates) before proposing `batch_size`
+    candidates at a time which maximize the ratio between the density of the
+    good and the bad candidates observed so far, as scored by `objective`.
+
+    `warm_start` holds history entries of earlier searches, they guide the
+    proposals but only enter `cv_results_` when they are evaluated again.
+    """
+
+    def __init__(self, estimator, param_distributions, *, n_iter=30, n_startup=10, batch_size=5,
+                 scoring=None, objective=None, warm_start=None, n_jobs=None, cv=None,
+                 random_state=None, history=None):
+        super().__init__(
+            estimator,
+            scoring=scoring,
+            n_jobs=n_jobs,
+            refit=False,
+            cv=cv,
+            return_train_score=False
+        )
+        self.param_distributions = param_distributions
+        self.n_iter = n_iter
+        self.n_startup = n_startup
+        self.batch_size = batch_size
+        self.objective = objective
+        self.warm_start = warm_start
+        self.random_state = random_state
+        self.history = history
+
+    def fit(self, X, y=None, **fit_params):
+        """Run the search and record the evaluated parameters"""
+
+        super().fit(X, y, **fit_params)
+        self.n_fits_ = len(self.cv_results_['params']) * self.n_splits_
+
+        if self.history is not None:
+            self.history.append(results_to_history(self.cv_results_, list(self.scoring), self.n_splits_))
+
+        return self
+
+    def _run_search(self, evaluate_candidates):
+        """Evaluate the startup candidates, then the proposals of the model"""
+
+        random_state = check_random_state(self.random_state)
+        objective = self.objective or list(self.scoring)[0]
+        spaces = self.param_distributions if isinstance(self.param_distributions, list) \
+            else [self.param_distributions]
+        spaces = [{name: Dimension(values) for name, values in space.items()} for space in spaces]
+
+        previous = self._warm_start_observations(spaces, objective)
+        visited = set()
+        observations = previous
+        startup = [params for params, _ in sorted(previous.values(), key=lambda item: -item[1])]
+
+        while len(visited) < self.n_iter:
+            size = min(self.batch_size, self.n_iter - len(visited))
+
+            if len(visited) < self.n_startup:
+                size = min(self.n_startup - len(visited), self.n_iter - len(visited))
+                candidates = startup[:size]
+                startup = startup[size:]
+                candidates += self._sample_random(
+                    size - len(candidates),
+                    visited | {parameter_key(params) for params in candidates},
+                    random_state
+                )
+            else:
+                candidates = self._propose(spaces, observations, size, visited, random_state)
+
+            if not candidates:
+                break
+
+            visited.update(parameter_key(params) for params in candidates)
+            results = evaluate_candidates(candidates)
+
+            # Current scores supersede the scores of the warm start
+            observations = dict(previous)
+            for params, score in zip(results['params'], results['mean_test_%s' % objective]):
+                observations[parameter_key(params)] = (params, score)
+
+    def _warm_start_observations(self, spaces, objective):
+        """Valid parameters of the warm start with their mean objective score"""
+
+        observations = {}
+
+        for entry in self.warm_start or []:
+            key = parameter_key(entry['params'])
+            scores = entry['scores'].get(objective)
+
+            if key in observations or scores is None or np.all(np.isnan(scores)) or\
+                self._locate(spaces, entry['params']) is None:
+                continue
+
+            observations[key] = (entry['params'], float(np.nanmean(scores)))
+
+        return observations
+
+    def _locate(self, spaces, params):
+        """Index of the space the parameters belong to and their encoded points"""
+
+        for index, space in enumerate(spaces):
+            if set(space) != set(params):
+                continue
+
+            points = {name: dimension.encode(params[name]) for name, dimension in space.items()}
+            if None not in points.values():
+                return (index, points)
+
+        return None
+
+    def _propose(self, spaces, observations, size, visited, random_state):
+        """Propose the candidates maximizing the ratio between the good and bad densities"""
+
+        observed = [
+            (score, self._locate(spaces, params)) for params, score in observations.values()
+            if not np.isnan(score)
+        ]
+        observed = [item for item in observed if item[1] is not None]
+        observed.sort(key=lambda item: -item[0])
+
+        n_good = max(1, ceil(GAMMA * len(observed)))
+        groups = (observed[:n_good], observed[n_good:])
+
+        # The space is itself treated as a categorical dimension
+        space_dimension = Dimension(range(len(spaces)), categorical=True)
+        taken = set(visited)
+        proposals = []
+
+        for _ in range(MAX_PROPOSAL_ATTEMPTS):
+            n_samples = N_EI_CANDIDATES * size
+            good, bad = [Density(space_dimension, [item[1][0] for item in group]) for group in groups]
+            space_samples = good.sample(n_samples, random_state)
+            ratios = good.log_pdf(space_samples) - bad.log_pdf(space_samples)
+            samples = [{} for _ in range(n_samples)]
+
+            for index, space in enumerate(spaces):
+                members = np.flatnonzero(space_samples == index)
+                if not len(members):
+                    continue
+
+                for name, dimension in space.items():
+                    good, bad = [
+                        Density(dimension, [item[1][1][name] for item in group if item[1][0] == index])
+                        for group in groups
+                    ]
+                    points = good.sample(len(members), random_state)
+                    ratios[members] += good.log_pdf(points) - bad.log_pdf(points)
+
+                    for member, point in zip(members, points):
+                        samples[member][name] = dimension.decode(point)
+
+            for index in np.argsort(-ratios, kind='stable'):
+                key = parameter_key(samples[index])
+                if key in taken:
+                    continue
+
+                taken.add(key)
+                proposals.append(samples[index])
+
+                if len(proposals) == size:
+                    return proposals
+
+        return proposals
+
+    def _sample_random(self, size, visited, random_state):
+        """Sample unvisited candidates from the prior distributions"""
+
+        candidates = []
+        if size <= 0:
+            return candidates
+
+        taken = set(visited)
+        for params in ParameterSampler(
+                self.param_distributions, size * MAX_PROPOSAL_ATTEMPTS, random_state=random_state):
+            key = parameter_key(params)
+            if key in taken:
+                continue
+
+            taken.add(key)
+            candidates.append(params)
+
+            if len(candidates) == size:
+                break
+
+        return candidates
@@ -5,22 +5,47 @@ scoring method.
 """
 
 import json
+from uuid import uuid4
+
 from sklearn.base import clone
 
-from .processors.estimators import ESTIMATORS
+from .processors.estimators import ESTIMATORS, INCREMENTAL_ESTIMATORS
 from .processors.scorers import SCORER_NAMES
+from .out_of_core import REFIT_CHUNK_SIZE, fit_incremental
 from .preprocess import preprocess
 
 MODELS_TO_EVALUATE = 2
 
-def refit_model(pipeline, features, estimator, scoring, x_train, y_train):
+def fit_estimator(estimator, params, x_train, y_train):
+    """Fit the estimator with the provided parameters"""
+
+    return clone(ESTIMATORS[estimator]).set_params(**params).fit(x_train, y_train)
+
+def fit_call(estimator, params, x_train, y_train, call):
+    """
+    Fit the estimator along with the `call` fitting it, which is not part of the
+    memoized arguments: a cached fit returns the call which originally ran it.
+    """
+
+    return (fit_estimator(estimator, params, x_train, y_train), call)
+
+def refit_model(pipeline, features, estimator, scoring, x_train, y_train, memory=None):
     """
     Determine the best model based on the provided scoring method
     and the fitting pipeline results.
+
+    When memory is provided, each distinct set of parameters is fitted once
+    per transformed training set and shared between scorers and searchers.
+
+    Incremental estimators are refit a chunk at a time on large training sets
+    so the transformed training set is never held in memory as a whole.
     """
 
+    incremental = estimator in INCREMENTAL_ESTIMATORS and len(x_train) > REFIT_CHUNK_SIZE
+
     # Transform values based on the pipeline
-    x_train = preprocess(features, pipeline, x_train)
+    if not incremental:
+        x_train = preprocess(features, pipeline, x_train)
 
     results = pipeline.named_steps['estimator'].cv_results_
 
@@ -41,12 +66,25 @@ def refit_model(pipeline, features, estimator, scoring, x_train, y_train):
         print('\t#%d %s parameters:' % (position+1, SCORER_NAMES[scoring]),
               json.dumps(best_params_, indent=4, sort_keys=True).replace('\n', '\n\t'))
 
-        model = clone(ESTIMATORS[estimator]).set_params(
-            **best_params_).fit(x_train, y_train)
+        if incremental:
+            refit = True
+            model = fit_incremental(
+                clone(ESTIMATORS[estimator]).set_params(**best_params_), x_train, y_train,
+                lambda x: preprocess(features, pipeline, x))
+        elif memory is not None:
+            # A single memoized call, so the training set is hashed once, it is a refit when it ran
+            call = uuid4().hex
+            model, fitted_by = memory.cache(fit_call, ignore=['call'])(
+                estimator, best_params_, x_train, y_train, call)
+            refit = fitted_by == call
+        else:
+            refit = True
+            model = fit_estimator(estimator, best_params_, x_train, y_train)
 
         models.append({
             'best_estimator': model,
-            'best_params': best_params_
+            'best_params': best_params_,
+            'refit': refit
         })
 
     return models
@@ -2,32 +2,21 @@
 Compute reliability curve and Briar score
 """
 
-import numpy as np
 import pandas as pd
-from joblib import load
 
 from sklearn.calibration import calibration_curve
 from sklearn.metrics import brier_score_loss
 
-from .preprocess import preprocess
+from .evaluate import score_model
+from .model_registry import load_model
 
 def reliability(pipeline, features, model, x_test, y_test):
     """Compute reliability curve and Briar score"""
 
-    # Transform values based on the pipeline
-    x_test = preprocess(features, pipeline, x_test)
+    return compute_reliability(y_test, score_model(features, model, pipeline, x_test)['scores'])
 
-    if hasattr(model, 'decision_function'):
-        probabilities = model.decision_function(x_test)
-
-        if np.count_nonzero(probabilities):
-            if probabilities.max() - probabilities.min() == 0:
-                probabilities = [0] * len(probabilities)
-            else:
-                probabilities = (probabilities - probabilities.min()) / \
-                    (probabilities.max() - probabilities.min())
-    else:
-        probabilities = model.predict_proba(x_test)[:, 1]
+def compute_reliability(y_test, probabilities):
+    """Compute reliability curve and Briar score from the calibration scores"""
 
     fop, mpv = calibration_curve(y_test, probabilities, n_bins=10, strategy='uniform')
     brier_score = brier_score_loss(y_test, probabilities)
@@ -43,6 +32,6 @@ def additional_reliability(payload, label, folder):
     x = data[payload['features']].to_numpy()
     y = data[label]
 
-    pipeline = load(folder + '.joblib')
+    pipeline = load_model(folder + '.joblib')
 
     return reliability(pipeline, payload['features'], pipeline.steps[-1][1], x, y)
@@ -0,0 +1,299 @@
+"""
+SQLite store of the results of a job, appended to as each pipeline
+completes. Scalar metrics are typed columns of the `results` table and
+curves are kept apart in the `curves` table so summaries can be read
+without loading them. The `checkpoints` table records the pipelines a job
+has completed, along with their results, so an interrupted job resumes.
+"""
+
+import json
+import os
+import sqlite3
+from numbers import Number
+
+import numpy as np
+import pandas as pd
+
+# Define the result columns holding curves
+CURVE_COLUMNS = [
+    'test_fpr', 'test_tpr',
+    'generalization_fpr', 'generalization_tpr',
+    'fop', 'mpv',
+    'precision', 'recall'
+]
+
+# Define the result columns the results are commonly filtered on
+FILTER_COLUMNS = ['algorithm', 'scaler', 'feature_selector', 'searcher', 'scorer']
+
+def create_result_store(output_path, signature=None):
+    """
+    Create an empty result store for the provided job folder, the store of
+    an interrupted run of the same job (same `signature`) is kept instead.
+    """
+
+    path = output_path + '/report.db'
+    if signature is not None and os.path.exists(path):
+        result_store = ResultStore(path)
+        checkpoints = result_store.checkpoints()
+
+        if checkpoints and all(checkpoint['signature'] == signature for checkpoint in checkpoints):
+            return result_store
+
+        result_store.close()
+
+    for suffix in ['', '-wal', '-shm']:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    return ResultStore(path)
+
+def load_result_store(output_path):
+    """
+    Open the result store of a job folder, jobs trained before the store
+    existed have it built (and indexed) from their CSV report once.
+    """
+
+    path = output_path + '/report.db'
+    if not os.path.exists(path):
+        if not os.path.exists(output_path + '/report.csv'):
+            return None
+
+        try:
+            report = pd.read_csv(output_path + '/report.csv')
+        except ValueError:
+            return None
+
+        # Build the store aside so concurrent readers never see a partial store
+        temporary_path = path + '.' + str(os.getpid())
+        result_store = ResultStore(temporary_path, wal=False)
+        result_store.append(report.astype(object).where(report.notnull(), None).to_dict('records'))
+        result_store.create_indices()
+        result_store.close()
+        os.replace(temporary_path, path)
+
+    return ResultStore(path)
+
+class ResultStore:
+    """Results of a job stored in a SQLite database"""
+
+    def __init__(self, path, wal=True):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+
+        # Readers (eg. the results endpoint) are not blocked while the job appends
+        if wal:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+
+    def close(self):
+        """Close the connection to the database"""
+
+        self.connection.close()
+
+    def columns(self):
+        """Names of the scalar columns, in the order they were reported"""
+
+        return [
+            row[1] for row in self.connection.execute('PRAGMA table_info(results)')
+            if row[1] != 'id'
+        ]
+
+    def append(self, results, checkpoint=None, signature=None):
+        """
+        Append the results of a pipeline within a single transaction, along
+        with the `checkpoint` (its position and state) of the pipeline if set.
+        """
+
+        with self.connection:
+            if checkpoint is not None:
+                self.connection.execute(
+                    'CREATE TABLE IF NOT EXISTS checkpoints (position INTEGER PRIMARY KEY, signature TEXT, state TEXT)')
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO checkpoints (position, signature, state) VALUES (?, ?, ?)',
+                    [checkpoint['position'], signature, json.dumps(_plain(checkpoint['state']))]
+                )
+
+            if not results:
+                return
+
+            columns = [name for name in results[0] if name not in CURVE_COLUMNS]
+            self._create_tables(columns, [_plain(results[0][name]) for name in columns])
+
+            for result in results:
+                cursor = self.connection.execute(
+                    'INSERT INTO results (%s) VALUES (%s)' % (
+                        ', '.join(_quote(name) for name in columns),
+                        ', '.join(['?'] * len(columns))
+                    ),
+                    [_encode(result[name]) for name in columns]
+                )
+
+                self.connection.executemany(
+                    'INSERT INTO curves (result_id, name, points) VALUES (?, ?, ?)',
+                    [
+                        (cursor.lastrowid, name, _encode_curve(result[name]))
+                        for name in CURVE_COLUMNS if name in result
+                    ]
+                )
+
+    def checkpoints(self):
+        """Checkpoints of the completed pipelines, in the order of their position"""
+
+        if self.connection.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name='checkpoints'").fetchone() is None:
+            return []
+
+        return [
+            {'position': position, 'signature': signature, 'state': json.loads(state)}
+            for position, signature, state in self.connection.execute(
+                'SELECT position, signature, state FROM checkpoints ORDER BY position')
+        ]
+
+    def create_indices(self):
+        """Index the metric and filter columns once the job has completed"""
+
+        if not self._exists():
+            return
+
+        with self.connection:
+            for row in self.connection.execute('PRAGMA table_info(results)').fetchall():
+                if row[1] in FILTER_COLUMNS or row[2] in ['INTEGER', 'REAL'] and row[1] != 'id':
+                    self.connection.execute('CREATE INDEX IF NOT EXISTS %s ON results (%s)' % (
+                        _quote('results_' + row[1]), _quote(row[1])))
+
+    def count(self, filters=None):
+        """Number of results matching the filters"""
+
+        if not self._exists():
+            return 0
+
+        where, parameters = self._where(filters)
+        return self.connection.execute('SELECT COUNT(*) FROM results' + where, parameters).fetchone()[0]
+
+    def load(self, columns=None, curves=True, filters=None, sort=None, ascending=False, limit=None, offset=0):
+        """
+        Load the results as records, restricted to the provided columns when
+        set. Curves are included as JSON strings when listed in the columns,
+        or when no columns are provided and `curves` is true.
+
+        `filters` maps columns to their accepted values, the results can be
+        sorted by any scalar column (missing values last) and paginated.
+        """
+
+        if not self._exists():
+            return []
+
+        available = self.columns()
+        scalar_columns = [name for name in (columns or available) if name in available]
+        if columns:
+            curve_columns = [name for name in columns if name in CURVE_COLUMNS]
+        else:
+            curve_columns = CURVE_COLUMNS if curves else []
+
+        where, parameters = self._where(filters)
+        order = 'id'
+        if sort is not None:
+            order = '%s IS NULL, %s %s, id' % (_quote(sort), _quote(sort), 'ASC' if ascending else 'DESC')
+
+        selection = 'FROM results%s ORDER BY %s' % (where, order)
+        if limit is not None:
+            selection += ' LIMIT ? OFFSET ?'
+            parameters += [limit, offset]
+
+        rows = self.connection.execute(
+            'SELECT %s %s' % (', '.join(['id'] + [_quote(name) for name in scalar_columns]), selection),
+            parameters
+        ).fetchall()
+        records = {row[0]: dict(zip(scalar_columns, row[1:])) for row in rows}
+
+        if curve_columns and records:
+            for result_id, name, points in self.connection.execute(
+                    'SELECT result_id, name, points FROM curves WHERE name IN (%s) AND result_id IN (SELECT id %s)' % (
+                        ', '.join(['?'] * len(curve_columns)), selection
+                    ), curve_columns + parameters):
+                records[result_id][name] = points
+
+        return list(records.values())
+
+    def _where(self, filters):
+        """Where clause and parameters of the filters"""
+
+        clauses = []
+        parameters = []
+
+        for name, values in (filters or {}).items():
+            clauses.append('%s IN (%s)' % (_quote(name), ', '.join(['?'] * len(values))))
+            parameters += list(values)
+
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else '', parameters)
+
+    def _exists(self):
+        """Whether any result was stored"""
+
+        return self.connection.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='results'").fetchone() is not None
+
+    def _create_tables(self, columns, values):
+        """Create the tables, typing the columns from the first result"""
+
+        if self._exists():
+            return
+
+        self.connection.execute('CREATE TABLE results (id INTEGER PRIMARY KEY, %s)' % ', '.join(
+            '%s %s' % (_quote(name), _column_type(value)) for name, value in zip(columns, values)
+        ))
+        self.connection.execute(
+            'CREATE TABLE curves (result_id INTEGER REFERENCES results(id), name TEXT, points TEXT)')
+        self.connection.execute('CREATE INDEX curves_result ON curves (result_id, name)')
+
+def _quote(name):
+    """Quote a column name"""
+
+    return '"' + name.replace('"', '""') + '"'
+
+def _column_type(value):
+    """SQLite type of a column based on a sample value"""
+
+    if isinstance(value, bool) or not isinstance(value, Number):
+        return 'TEXT'
+
+    return 'INTEGER' if isinstance(value, int) else 'REAL'
+
+def _plain(value):
+    """Convert NumPy values (also within lists and dictionaries) to Python values"""
+
+    if isinstance(value, np.generic):
+        return value.item()
+
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_plain(item) for item in value]
+
+    if isinstance(value, dict):
+        return {name: _plain(item) for name, item in value.items()}
+
+    return value
+
+def _encode_curve(value):
+    """Encode the points of a curve as JSON"""
+
+    # Curves read back from a CSV report are already serialized
+    if isinstance(value, str) or value is None:
+        return value
+
+    return json.dumps(_plain(value))
+
+def _encode(value):
+    """Encode a value for a scalar column"""
+
+    value = _plain(value)
+
+    # Empty values (eg. undefined confidence intervals) are stored as null
+    if value == '':
+        return None
+
+    if isinstance(value, list) and all(isinstance(item, Number) for item in value):
+        return json.dumps(value)
+
+    if isinstance(value, (list, dict)):
+        return str(value)
+
+    return value
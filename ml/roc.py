@@ -2,32 +2,31 @@
 Compute receiver operating characteristic
 """
 
+import numpy as np
 import pandas as pd
-from joblib import load
 
 from sklearn.metrics import roc_curve, roc_auc_score
 
-from .preprocess import preprocess
+from .evaluate import score_model
+from .model_registry import load_model
 from .utils import decimate_points
 
 def roc(pipeline, features, model, x_test, y_test):
     """Generate the ROC values"""
 
-    # Transform values based on the pipeline
-    x_test = preprocess(features, pipeline, x_test)
+    return compute_roc(y_test, score_model(features, model, pipeline, x_test)['probabilities'])
 
-    probabilities = model.predict_proba(x_test)
-    fpr, tpr, _ = roc_curve(y_test, probabilities[:, 1])
+def compute_roc(y_test, probabilities):
+    """Generate the ROC values from the probabilities of the positive class"""
 
-    fpr, tpr = decimate_points(
-      [round(num, 4) for num in list(fpr)],
-      [round(num, 4) for num in list(tpr)]
-    )
+    fpr, tpr, _ = roc_curve(y_test, probabilities)
+
+    fpr, tpr = decimate_points(np.round(fpr, 4), np.round(tpr, 4))
 
     return {
         'fpr': list(fpr),
         'tpr': list(tpr),
-        'roc_auc': roc_auc_score(y_test, probabilities[:, 1])
+        'roc_auc': roc_auc_score(y_test, probabilities)
     }
 
 def additional_roc(payload, label, folder):
@@ -35,6 +34,6 @@ def additional_roc(payload, label, folder):
     x = data[payload['features']].to_numpy()
     y = data[label]
 
-    pipeline = load(folder + '.joblib')
+    pipeline = load_model(folder + '.joblib')
 
     return roc(pipeline, payload['features'], pipeline.steps[-1][1], x, y)
@@ -0,0 +1,159 @@
+"""
+Schedules independent pipelines across a pool of processes
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import cpu_count
+
+# Define the total number of cores a job may use
+MAX_CORES = int(os.getenv('MAX_CORES', cpu_count()))
+
+# Define the number of pipelines which may run concurrently
+PIPELINE_JOBS = int(os.getenv('PIPELINE_JOBS', 1))
+
+# State shared with each process of the pool (set once per process)
+_SHARED = {}
+
+def core_budget(pipeline_jobs=PIPELINE_JOBS, max_cores=MAX_CORES):
+    """
+    Divide the available cores between pipeline level parallelism
+    and the parallelism used by the cross validation of each pipeline.
+    """
+
+    pipeline_jobs = max(1, min(pipeline_jobs, max_cores))
+    return (pipeline_jobs, max(1, max_cores // pipeline_jobs))
+
+def schedule(function, tasks, shared=(), n_jobs=1, dependencies=None, order=None, choose=None):
+    """
+    Run `function(task, *shared)` for every task and yield `(index, result)`
+    pairs as the tasks complete, callers needing the order of the tasks
+    sort the results themselves.
+
+    `dependencies` maps the index of a task to the index of another task
+    which must complete before it is started. `order` lists the indices of
+    the tasks in the order they are started (eg. the longest first).
+
+    With `choose`, tasks are started one at a time as processes free up:
+    it is called with the indices of the tasks ready to start and returns
+    the index to start (or None to start no more tasks).
+    """
+
+    dependencies = dependencies or {}
+
+    if choose is not None:
+        yield from _schedule_adaptive(function, tasks, shared, n_jobs, dependencies, choose)
+        return
+
+    if n_jobs <= 1:
+        waiting = list(order or range(len(tasks)))
+        finished = set()
+
+        while waiting:
+            index = next(i for i in waiting if i not in dependencies or dependencies[i] in finished)
+            waiting.remove(index)
+            yield (index, function(tasks[index], *shared))
+            finished.add(index)
+        return
+
+    # The shared arguments (eg. the imported arrays) are sent once to each
+    # process instead of once per task.
+    executor = ProcessPoolExecutor(
+        max_workers=n_jobs,
+        initializer=_initialize,
+        initargs=(function, shared)
+    )
+
+    try:
+        futures = {}
+        waiting = []
+        for index in order or range(len(tasks)):
+            if index in dependencies:
+                waiting.append(index)
+            else:
+                futures[executor.submit(_run, tasks[index])] = index
+
+        pending = set(futures)
+        finished = set()
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                yield (futures[future], future.result())
+                finished.add(futures[future])
+
+            # Start the tasks whose dependency has completed
+            for index in [i for i in waiting if dependencies[i] in finished]:
+                waiting.remove(index)
+                future = executor.submit(_run, tasks[index])
+                futures[future] = index
+                pending.add(future)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def _schedule_adaptive(function, tasks, shared, n_jobs, dependencies, choose):
+    """Start the tasks picked by `choose` as processes free up, yielding the results as they complete"""
+
+    started = set()
+    finished = set()
+
+    def ready():
+        return [
+            index for index in range(len(tasks))
+            if index not in started and (index not in dependencies or dependencies[index] in finished)
+        ]
+
+    if n_jobs <= 1:
+        while ready():
+            index = choose(ready())
+            if index is None:
+                return
+
+            started.add(index)
+            yield (index, function(tasks[index], *shared))
+            finished.add(index)
+        return
+
+    executor = ProcessPoolExecutor(
+        max_workers=n_jobs,
+        initializer=_initialize,
+        initargs=(function, shared)
+    )
+
+    try:
+        futures = {}
+        stopped = False
+
+        while True:
+            while not stopped and len(futures) < n_jobs and ready():
+                index = choose(ready())
+                if index is None:
+                    stopped = True
+                    break
+
+                started.add(index)
+                futures[executor.submit(_run, tasks[index])] = index
+
+            if not futures:
+                return
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                index = futures.pop(future)
+                yield (index, future.result())
+                finished.add(index)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def _initialize(function, shared):
+    """Store the shared state for the current process"""
+
+    _SHARED['function'] = function
+    _SHARED['arguments'] = shared
+
+def _run(task):
+    """Run a single task within a process of the pool"""
+
+    return _SHARED['function'](task, *_SHARED['arguments'])
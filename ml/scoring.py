@@ -0,0 +1,86 @@
+"""
+Bulk scoring of a CSV file against an exported model. The file is split
+into partitions (byte ranges aligned on rows) which are scored chunk by
+chunk by a pool of processes and joined back in order.
+"""
+
+import os
+from io import BytesIO
+from shutil import copyfileobj
+
+from .predict import SCORE_CHUNK_SIZE, predict_stream
+from .scheduler import MAX_CORES, schedule
+
+# Define the size (in megabytes) of the partitions of a file scored by a process
+SCORE_PARTITION_SIZE = int(os.getenv('SCORE_PARTITION_SIZE', 64))
+
+def score_file(input_path, model_path, output_path, threshold=.5, features=None, output_format='csv',
+               n_jobs=MAX_CORES, partition_size=SCORE_PARTITION_SIZE * 1024 * 1024,
+               update_function=lambda x, y: None):
+    """Score a CSV file, `update_function` is called as each partition is scored"""
+
+    header, partitions = partition_file(input_path, partition_size)
+    temporary_path = output_path + '.' + str(os.getpid())
+
+    # The partitions complete in any order and are joined back in the order of the file
+    part_paths = {}
+    for index, part_path in schedule(
+            score_partition,
+            list(enumerate(partitions)),
+            (input_path, header, model_path, output_path, threshold, features, output_format),
+            min(n_jobs, len(partitions))):
+        part_paths[index] = part_path
+        update_function(len(part_paths), len(partitions))
+
+    with open(temporary_path, 'wb') as output_file:
+        for index in range(len(partitions)):
+            with open(part_paths[index], 'rb') as part_file:
+                copyfileobj(part_file, output_file)
+
+            os.remove(part_paths[index])
+
+    os.replace(temporary_path, output_path)
+
+def partition_file(path, partition_size):
+    """
+    Header line of a CSV file and the byte ranges of its rows, split on line boundaries outside of
+    quoted fields (which may span lines). A file without any row has a single empty partition.
+    """
+
+    partitions = []
+
+    with open(path, 'rb') as file:
+        header = file.readline()
+        start = end = len(header)
+        quoted = False
+
+        for line in file:
+            end += len(line)
+
+            # An odd number of quotes opens or closes a field, escaped quotes come in pairs
+            quoted ^= line.count(b'"') % 2 == 1
+            if not quoted and end - start >= partition_size:
+                partitions.append((start, end))
+                start = end
+
+    if end > start or not partitions:
+        partitions.append((start, end))
+
+    return (header, partitions)
+
+def score_partition(partition, input_path, header, model_path, output_path, threshold, features, output_format):
+    """Score the rows of a partition into a part file, returning its path"""
+
+    index, (start, end) = partition
+    part_path = output_path + '.part' + str(index)
+
+    with open(input_path, 'rb') as input_file:
+        input_file.seek(start)
+        rows = BytesIO(header + input_file.read(end - start))
+
+    with open(part_path, 'w') as part_file:
+        for chunk in predict_stream(
+                rows, model_path, threshold, features, output_format, SCORE_CHUNK_SIZE, header=index == 0):
+            part_file.write(chunk)
+
+    return part_path
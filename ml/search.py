@@ -7,32 +7,48 @@ and hyper-parameters with feature engineering.
 
 import csv
 import json
+import os
 import time
 import itertools
+from shutil import rmtree
 
+import numpy as np
+import pandas as pd
 from dotenv import load_dotenv
-from joblib import dump
+from joblib import load
 from timeit import default_timer as timer
 
 from .processors.estimators import ESTIMATOR_NAMES
 from .processors.feature_selection import FEATURE_SELECTOR_NAMES
 from .processors.scalers import SCALER_NAMES
-from .processors.searchers import SEARCHER_NAMES
+from .processors.searchers import DEFAULT_IGNORE_SEARCHER, SEARCHER_DEPENDENCIES, SEARCHER_NAMES, SEARCHERS
 from .processors.scorers import SCORER_NAMES
-from .generalization import generalize
+from .budget import SearchBudget
+from .cost_model import fit_budget, load_runtime_model, longest_first, remaining_time
+from .cache import clear_transform_cache, create_transform_cache, reduce_transform_cache
+from .evaluate import score_model
+from .generalization import generalization_report
 from .model import generate_model
+from .model_registry import dump_model
+from .out_of_core import clear_shared_arrays, sample_rows, share_arrays
 from .import_data import import_data
 from .pipeline import generate_pipeline
-from .precision import precision_recall
-from .reliability import reliability
+from .precision import compute_precision_recall
+from .reliability import compute_reliability
+from .processors.history import SearchHistory, find_warm_start
 from .refit import refit_model
-from .roc import roc
+from .results import create_result_store
+from .roc import compute_roc
+from .scheduler import MAX_CORES, core_budget, schedule
 from .summary import print_summary
 from .utils import model_key_to_name
 
 # Load environment variables
 load_dotenv()
 
+# Define the arrays of a job staged for its pipelines to be run by other machines
+STAGED_ARRAYS = ['x_train', 'x_test', 'y_train', 'y_test', 'x2', 'y2']
+
 def find_best_model(
         train_set=None,
         test_set=None,
@@ -40,20 +56,19 @@ def find_best_model(
         label_column=None,
         parameters=None,
         output_path='.',
-        update_function=lambda x, y: None
+        update_function=lambda x, y, z=None: None,
+        staged=False
     ):
-    """Generates all possible models and outputs the generalization results"""
+    """
+    Generates all possible models and outputs the generalization results,
+    when `staged` the pipelines were run by `run_staged_pipeline` (eg. as
+    Celery subtasks) and only their results are reported.
 
-    start = timer()
+    `update_function` is called with the number of completed pipelines,
+    the number of pipelines and the projected remaining time (or None).
+    """
 
-    ignore_estimator = [x.strip() for x in parameters.get('ignore_estimator', '').split(',')]
-    ignore_feature_selector = \
-        [x.strip() for x in parameters.get('ignore_feature_selector', '').split(',')]
-    ignore_scaler = [x.strip() for x in parameters.get('ignore_scaler', '').split(',')]
-    ignore_searcher = [x.strip() for x in parameters.get('ignore_searcher', '').split(',')]
-    shuffle = False if parameters.get('ignore_shuffle', '') != '' else True
-    scorers = [x for x in SCORER_NAMES if x not in \
-        [x.strip() for x in parameters.get('ignore_scorer', '').split(',')]]
+    start = timer()
 
     if train_set is None:
         print('Missing training data')
@@ -67,122 +82,204 @@ def find_best_model(
         print('Missing column name for classifier target')
         return {}
 
-    custom_hyper_parameters = json.loads(parameters['hyper_parameters'])\
-        if 'hyper_parameters' in parameters else None
-
     # Import data
-    (x_train, x_test, y_train, y_test, x2, y2, feature_names, metadata) = \
-        import_data(train_set, test_set, label_column)
+    if staged:
+        (x_train, x_test, y_train, y_test, x2, y2, feature_names, metadata) = \
+            load_staged_data(output_path, label_column)
+    else:
+        (x_train, x_test, y_train, y_test, x2, y2, feature_names, metadata) = \
+            import_data(train_set, test_set, label_column)
+
+    # Share large arrays between the processes rather than copying them to each
+    x_train, x_test, x2 = share_arrays(output_path + '/arrays', [x_train, x_test, x2])
+
+    # Search a stratified sample of large training sets, the best candidates are refit on every row
+    x_search, y_search = sample_rows(x_train, y_train)
 
     total_fits = {}
     csv_header_written = False
 
-    all_pipelines = list(itertools.product(*[
-        filter(lambda x: False if x in ignore_estimator else True, ESTIMATOR_NAMES),
-        filter(lambda x: False if x in ignore_scaler else True, SCALER_NAMES),
-        filter(lambda x: False if x in ignore_feature_selector else True, FEATURE_SELECTOR_NAMES),
-        filter(lambda x: False if x in ignore_searcher else True, SEARCHER_NAMES),
-    ]))
+    # Divide the cores between concurrent pipelines and their cross validation
+    pipeline_jobs, cv_jobs = core_budget()
+
+    # Plan the pipelines longest first within the time budget (if any)
+    all_pipelines, dependencies, costs = plan_job(parameters, output_path, x_search.size, pipeline_jobs)
 
     if not len(all_pipelines):
         print('No pipelines to run with the current configuration')
         return False
 
-    report = open(output_path + '/report.csv', 'w+')
+    # Pipelines completed by an interrupted run of the same job are not run again
+    signature = json.dumps([train_set, test_set, label_column, parameters], sort_keys=True)
+    result_store = create_result_store(output_path, signature)
+    checkpoints = result_store.checkpoints()
+    completed = [checkpoint['position'] for checkpoint in checkpoints]
+    remaining = [index for index in range(len(all_pipelines)) if index not in completed]
+
+    report = open(output_path + '/report.csv', 'r+' if checkpoints else 'w+')
     report_writer = csv.writer(report)
 
-    performance_report = open(output_path + '/performance_report.csv', 'w+')
+    performance_report = open(output_path + '/performance_report.csv', 'r+' if checkpoints else 'w+')
     performance_report_writer = csv.writer(performance_report)
-    performance_report_writer.writerow(['key', 'train_time (s)'])
-
-    for index, (estimator, scaler, feature_selector, searcher) in enumerate(all_pipelines):
-
-        # Trigger a callback for task monitoring purposes
-        update_function(index, len(all_pipelines))
-
-        key = '__'.join([scaler, feature_selector, estimator, searcher])
-        print('Generating ' + model_key_to_name(key))
-
-        # Generate the pipeline
-        pipeline = generate_pipeline(
-            scaler,
-            feature_selector,
-            estimator,
-            y_train,
-            scorers,
-            searcher,
-            shuffle,
-            custom_hyper_parameters
+
+    if checkpoints:
+        # Drop the rows written after the last checkpoint
+        state = max(checkpoints, key=lambda checkpoint: checkpoint['state']['report_offset'])['state']
+        report.truncate(state['report_offset'])
+        report.seek(state['report_offset'])
+        performance_report.truncate(state['performance_offset'])
+        performance_report.seek(state['performance_offset'])
+        csv_header_written = True
+
+        for checkpoint in checkpoints:
+            total_fits[checkpoint['state']['estimator']] = \
+                total_fits.get(checkpoint['state']['estimator'], 0) + checkpoint['state']['fits']
+
+        print('Resuming after %d completed pipelines' % len(completed))
+    else:
+        performance_report_writer.writerow(['key', 'train_time (s)'])
+
+    data = (x_train, x_test, y_train, y_test, x2, y2, x_search, y_search, feature_names, labels)
+    settings = job_settings(parameters, output_path, cv_jobs)
+    memory = settings['memory']
+
+    # Trigger a callback for task monitoring purposes
+    update_function(len(completed), len(all_pipelines), remaining_time([costs[i] for i in remaining], pipeline_jobs))
+
+    # Dependencies on completed pipelines are met already
+    dependencies = {
+        remaining.index(index): remaining.index(dependency)
+        for index, dependency in dependencies.items() if index in remaining and dependency in remaining
+    }
+
+    # Within a time or fit budget the most promising pipelines are started first, while budget remains
+    budget = None
+    if float(parameters.get('time_budget') or 0) > 0 or int(parameters.get('fit_budget') or 0) > 0:
+        scores = {}
+        for checkpoint in checkpoints:
+            scores[checkpoint['state']['estimator']] = max(
+                scores.get(checkpoint['state']['estimator'], -np.inf), checkpoint['state'].get('cv_score', -np.inf))
+
+        budget = SearchBudget(
+            [all_pipelines[index] for index in remaining],
+            [costs[index] for index in remaining],
+            [expected_fits(all_pipelines[index], settings, y_search) for index in remaining],
+            float(parameters.get('time_budget') or 0),
+            int(parameters.get('fit_budget') or 0),
+            sum(checkpoint['state'].get('train_time', 0) for checkpoint in checkpoints),
+            sum(total_fits.values()),
+            scores
+        )
+
+    if staged:
+        pipeline_results = load_pipeline_results(output_path, remaining)
+    else:
+        pipeline_results = (
+            (remaining[index], pipeline_result) for index, pipeline_result in schedule(
+                run_pipeline, [all_pipelines[index] for index in remaining], (data, settings), pipeline_jobs,
+                dependencies, longest_first([costs[index] for index in remaining]), budget and budget.choose)
         )
 
+    # The projected time is scaled by how long the completed pipelines took compared to their projection
+    projected_time = actual_time = 0
+
+    for index, pipeline_result in pipeline_results:
+        estimator = all_pipelines[index][0]
+        completed.append(index)
+
+        if budget is not None:
+            budget.record(remaining.index(index), pipeline_result)
+
         if not estimator in total_fits:
             total_fits[estimator] = 0
-        total_fits[estimator] += pipeline[1]
-
-        # Fit the pipeline
-        model = generate_model(pipeline[0], feature_names, x_train, y_train)
-        performance_report_writer.writerow([key, model['train_time']])
-
-        for scorer in scorers:
-            key += '__' + scorer
-            candidates = refit_model(pipeline[0], model['features'], estimator, scorer, x_train, y_train)
-            total_fits[estimator] += len(candidates)
-
-            for position, candidate in enumerate(candidates):
-                result = {
-                    'key': key + '__' + str(position),
-                    'scaler': SCALER_NAMES[scaler],
-                    'feature_selector': FEATURE_SELECTOR_NAMES[feature_selector],
-                    'algorithm': ESTIMATOR_NAMES[estimator],
-                    'searcher': SEARCHER_NAMES[searcher],
-                    'scorer': SCORER_NAMES[scorer]
-                }
-
-                print('\t#%d' % (position+1))
-                dump(candidate['best_estimator'], output_path + '/models/' + result['key'] + '.joblib')
-
-                result.update(generalize(model['features'], candidate['best_estimator'], pipeline[0], x2, y2, labels))
-                result.update({
-                    'selected_features': list(model['selected_features']),
-                    'feature_scores': model['feature_scores'],
-                    'best_params': candidate['best_params']
-                })
-                roc_auc = roc(pipeline[0], model['features'], candidate['best_estimator'], x_test, y_test)
-                result.update({
-                  'test_fpr': roc_auc['fpr'],
-                  'test_tpr': roc_auc['tpr'],
-                  'training_roc_auc': roc_auc['roc_auc']
-                })
-                result['roc_delta'] = round(abs(result['roc_auc'] - result['training_roc_auc']), 4)
-                roc_auc = roc(pipeline[0], model['features'], candidate['best_estimator'], x2, y2)
-                result.update({
-                  'generalization_fpr': roc_auc['fpr'],
-                  'generalization_tpr': roc_auc['tpr']
-                })
-                result.update(reliability(pipeline[0], model['features'], candidate['best_estimator'], x2, y2))
-                result.update(precision_recall(pipeline[0], model['features'], candidate['best_estimator'], x2, y2))
-
-                if not csv_header_written:
-                    report_writer.writerow(result.keys())
-                    csv_header_written = True
-
-                report_writer.writerow(list([str(i) for i in result.values()]))
+        total_fits[estimator] += pipeline_result['fits']
+
+        performance_report_writer.writerow([pipeline_result['key'], pipeline_result['train_time']])
+
+        for result in pipeline_result['results']:
+            if not csv_header_written:
+                report_writer.writerow(result.keys())
+                csv_header_written = True
+
+            report_writer.writerow(list([str(i) for i in result.values()]))
+
+        # Write the reports out before checkpointing the pipeline along with its results
+        for file in [report, performance_report]:
+            file.flush()
+            os.fsync(file.fileno())
+
+        result_store.append(pipeline_result['results'], {
+            'position': index,
+            'state': {
+                'key': pipeline_result['key'],
+                'estimator': estimator,
+                'fits': pipeline_result['fits'],
+                'train_time': pipeline_result['train_time'],
+                'cv_score': pipeline_result['cv_score'],
+                'report_offset': report.tell(),
+                'performance_offset': performance_report.tell()
+            }
+        }, signature)
+        reduce_transform_cache(memory)
+
+        if costs[index] is not None:
+            projected_time += costs[index]
+            actual_time += pipeline_result['train_time']
+
+        update_function(len(completed), len(all_pipelines), remaining_time(
+            [cost for position, cost in enumerate(costs) if position not in completed],
+            pipeline_jobs, actual_time / projected_time if projected_time else 1))
+
+    # Pipelines left out once the budget was spent
+    skipped = [
+        '__'.join([scaler, feature_selector, estimator, searcher])
+        for index, (estimator, scaler, feature_selector, searcher) in enumerate(all_pipelines)
+        if index not in completed
+    ]
+
+    if skipped:
+        print('Budget spent, %d pipelines were not run' % len(skipped))
+
+    clear_transform_cache(memory)
+    clear_shared_arrays(output_path + '/arrays')
+    rmtree(output_path + '/pipelines', ignore_errors=True)
+    if os.path.exists(output_path + '/plan.json'):
+        os.remove(output_path + '/plan.json')
 
     train_time = timer() - start
     print('\tTotal run time is {:.4f} seconds'.format(train_time), '\n')
     performance_report_writer.writerow(['total', train_time])
 
     report.close()
+    result_store.create_indices()
+    result_store.close()
     performance_report.close()
+
+    # The pipelines complete in any order, the reports list them in the order of the job
+    positions = {
+        '__'.join([scaler, feature_selector, estimator, searcher]): index
+        for index, (estimator, scaler, feature_selector, searcher) in enumerate(all_pipelines)
+    }
+    sort_report(output_path + '/report.csv', positions)
+    sort_report(output_path + '/performance_report.csv', positions)
+
     print('Total fits generated', sum(total_fits.values()))
     print_summary(output_path + '/report.csv')
 
     # Update the metadata and write it out
     metadata.update({
         'date': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
-        'fits': total_fits
+        'fits': total_fits,
+        'search_shape': list(x_search.shape)
     })
 
+    if budget is not None or skipped:
+        metadata['budget'] = {
+            'time_budget': float(parameters.get('time_budget') or 0),
+            'fit_budget': int(parameters.get('fit_budget') or 0),
+            'skipped': skipped
+        }
+
     if output_path != '.':
         with open(output_path + '/metadata.json', 'a+') as metafile:
             metafile.seek(0)
@@ -198,3 +295,302 @@ def find_best_model(
             json.dump(existing_metadata, metafile)
 
     return True
+
+def sort_report(path, positions):
+    """
+    Sort the rows of a report by the position of their pipeline, the header first and the rows of
+    other keys (eg. the total) last. The rows of a pipeline keep their order and the size of the
+    report is unchanged, so the offsets of the checkpoints still hold.
+    """
+
+    with open(path) as file:
+        rows = list(csv.reader(file))
+
+    rows[1:] = sorted(rows[1:], key=lambda row: positions.get('__'.join(row[0].split('__')[:4]), len(positions)))
+
+    with open(path + '.tmp', 'w') as file:
+        csv.writer(file).writerows(rows)
+    os.replace(path + '.tmp', path)
+
+def list_job_pipelines(parameters):
+    """
+    Pipelines of a job as (estimator, scaler, feature selector, searcher) tuples, along with
+    the dependencies between them (the index of a pipeline mapped to the index it builds upon)
+    """
+
+    ignore_estimator = [x.strip() for x in parameters.get('ignore_estimator', '').split(',')]
+    ignore_feature_selector = \
+        [x.strip() for x in parameters.get('ignore_feature_selector', '').split(',')]
+    ignore_scaler = [x.strip() for x in parameters.get('ignore_scaler', '').split(',')]
+    ignore_searcher = [x.strip() for x in parameters.get('ignore_searcher', DEFAULT_IGNORE_SEARCHER).split(',')]
+
+    all_pipelines = list(itertools.product(*[
+        filter(lambda x: False if x in ignore_estimator else True, ESTIMATOR_NAMES),
+        filter(lambda x: False if x in ignore_scaler else True, SCALER_NAMES),
+        filter(lambda x: False if x in ignore_feature_selector else True, FEATURE_SELECTOR_NAMES),
+        filter(lambda x: False if x in ignore_searcher else True, SEARCHER_NAMES),
+    ]))
+
+    return (all_pipelines, find_dependencies(all_pipelines))
+
+def find_dependencies(all_pipelines):
+    """Some searchers build upon the results of another searcher"""
+
+    return {
+        index: all_pipelines.index(pipeline[:3] + (SEARCHER_DEPENDENCIES[pipeline[3]],))
+        for index, pipeline in enumerate(all_pipelines)
+        if pipeline[3] in SEARCHER_DEPENDENCIES and
+        pipeline[:3] + (SEARCHER_DEPENDENCIES[pipeline[3]],) in all_pipelines
+    }
+
+def plan_job(parameters, output_path, size, slots=1):
+    """
+    Pipelines of a job, their dependencies and their expected run time (learned from earlier
+    jobs) for the number of cells searched. With a `time_budget` (in seconds) the most expensive
+    pipelines are downgraded to a cheaper searcher, or dropped, to fit the budget across `slots`.
+
+    The plan is kept in the job folder so a resumed job, or its subtasks, run the same pipelines.
+    """
+
+    plan = load_plan(output_path)
+    if plan is not None and plan['parameters'] == parameters:
+        return (plan['pipelines'], find_dependencies(plan['pipelines']), plan['costs'])
+
+    all_pipelines, _ = list_job_pipelines(parameters)
+    model = load_runtime_model(output_path)
+
+    if float(parameters.get('time_budget') or 0) > 0:
+        # Pipelines are only downgraded to the searchers the job did not ignore
+        searchers = [name for name in SEARCHER_NAMES if name in {pipeline[3] for pipeline in all_pipelines}]
+        all_pipelines, costs = fit_budget(
+            all_pipelines, model, size, float(parameters['time_budget']), searchers, slots)
+    else:
+        costs = [model.predict(pipeline, size) for pipeline in all_pipelines]
+
+    if output_path != '.':
+        with open(output_path + '/plan.json.tmp', 'w') as plan_file:
+            json.dump({
+                'parameters': parameters,
+                'pipelines': all_pipelines,
+                'costs': costs,
+                'slots': slots,
+                'start': time.time()
+            }, plan_file)
+        os.replace(output_path + '/plan.json.tmp', output_path + '/plan.json')
+
+    return (all_pipelines, find_dependencies(all_pipelines), costs)
+
+def load_plan(output_path):
+    """Planned pipelines of a job (None when it was not planned yet)"""
+
+    if not os.path.exists(output_path + '/plan.json'):
+        return None
+
+    with open(output_path + '/plan.json') as plan_file:
+        plan = json.load(plan_file)
+
+    plan['pipelines'] = [tuple(pipeline) for pipeline in plan['pipelines']]
+    return plan
+
+def job_settings(parameters, output_path, n_jobs):
+    """Settings shared by the pipelines of a job, `n_jobs` being the cores of their cross validation"""
+
+    return {
+        'memory': create_transform_cache(output_path),
+        'scorers': [x for x in SCORER_NAMES if x not in \
+            [x.strip() for x in parameters.get('ignore_scorer', '').split(',')]],
+        'shuffle': False if parameters.get('ignore_shuffle', '') != '' else True,
+        'early_stopping': True if parameters.get('early_stopping', '') != '' else False,
+        'custom_hyper_parameters': json.loads(parameters['hyper_parameters'])\
+            if 'hyper_parameters' in parameters else None,
+        'output_path': output_path,
+        'warm_start': find_warm_start(output_path),
+        'n_jobs': n_jobs
+    }
+
+def stage_job(train_set, test_set, label_column, output_path):
+    """
+    Import the data of a job once to its folder, for its pipelines to be run by other machines,
+    returning the number of cells (rows x features) the pipelines search
+    """
+
+    (x_train, x_test, y_train, y_test, x2, y2, feature_names, metadata) = \
+        import_data(train_set, test_set, label_column)
+
+    folder = output_path + '/arrays'
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+
+    for name, array in zip(STAGED_ARRAYS, [x_train, x_test, y_train, y_test, x2, y2]):
+        np.save(folder + '/' + name + '.npy', np.asarray(array))
+
+    with open(folder + '/staged.json', 'w') as staged_file:
+        json.dump({'feature_names': feature_names, 'metadata': metadata}, staged_file)
+
+    # The results of the pipelines are kept there, it exists even when no pipeline runs (eg. over budget)
+    os.makedirs(output_path + '/pipelines', exist_ok=True)
+
+    # Number of cells searched
+    return sample_rows(x_train, y_train)[0].size
+
+def load_staged_data(output_path, label_column):
+    """Data of a staged job (memory mapped) in the order `import_data` returns it"""
+
+    folder = output_path + '/arrays'
+    arrays = {name: np.load(folder + '/' + name + '.npy', mmap_mode='r') for name in STAGED_ARRAYS}
+
+    with open(folder + '/staged.json') as staged_file:
+        staged = json.load(staged_file)
+
+    return [
+        arrays['x_train'], arrays['x_test'],
+        pd.Series(arrays['y_train'], name=label_column), pd.Series(arrays['y_test'], name=label_column),
+        arrays['x2'], pd.Series(arrays['y2'], name=label_column),
+        staged['feature_names'], staged['metadata']
+    ]
+
+def run_staged_pipeline(index, labels, label_column, parameters, output_path, n_jobs=MAX_CORES):
+    """
+    Run a pipeline of a staged job, keeping its result in the job folder
+    for the job to be reported once all of its pipelines have run.
+    Returns the number of fits, pipelines which already ran are not run again.
+    """
+
+    path = output_path + '/pipelines/' + str(index) + '.joblib'
+    if os.path.exists(path):
+        return load(path)['fits']
+
+    # Pipelines are not started once they would exceed the time budget of the job
+    plan = load_plan(output_path)
+    time_budget = float(parameters.get('time_budget') or 0)
+    if time_budget and time.time() - plan['start'] + (plan['costs'][index] or 0) > time_budget:
+        return 0
+
+    (x_train, x_test, y_train, y_test, x2, y2, feature_names, _) = load_staged_data(output_path, label_column)
+    x_search, y_search = sample_rows(x_train, y_train)
+
+    pipeline_result = run_pipeline(
+        plan['pipelines'][index],
+        (x_train, x_test, y_train, y_test, x2, y2, x_search, y_search, feature_names, labels),
+        job_settings(parameters, output_path, n_jobs)
+    )
+
+    os.makedirs(output_path + '/pipelines', exist_ok=True)
+    dump_model(pipeline_result, path)
+    return pipeline_result['fits']
+
+def load_pipeline_results(output_path, indices):
+    """Results of the pipelines of a staged job which ran"""
+
+    for index in indices:
+        # Pipelines left out once the time budget was spent did not run
+        if os.path.exists(output_path + '/pipelines/' + str(index) + '.joblib'):
+            yield (index, load(output_path + '/pipelines/' + str(index) + '.joblib'))
+
+def expected_fits(pipeline, settings, y_search):
+    """Number of fits the search of a pipeline performs, as its searcher counts them without fitting"""
+
+    estimator, _, _, searcher = pipeline
+    return SEARCHERS[searcher](
+        estimator, {scorer: scorer for scorer in settings['scorers']}, settings['shuffle'],
+        settings['custom_hyper_parameters'], y_search, n_jobs=1, early_stopping=settings['early_stopping'])[1]
+
+def run_pipeline(pipeline, data, settings):
+    """Fit, refit and evaluate a single pipeline returning its report rows"""
+
+    estimator, scaler, feature_selector, searcher = pipeline
+    (x_train, x_test, y_train, y_test, x2, y2, x_search, y_search, feature_names, labels) = data
+    scorers = settings['scorers']
+    output_path = settings['output_path']
+
+    key = '__'.join([scaler, feature_selector, estimator, searcher])
+    print('Generating ' + model_key_to_name(key))
+
+    # Generate the pipeline
+    pipeline = generate_pipeline(
+        scaler,
+        feature_selector,
+        estimator,
+        y_search,
+        scorers,
+        searcher,
+        settings['shuffle'],
+        settings['custom_hyper_parameters'],
+        settings['n_jobs'],
+        settings['memory'],
+        SearchHistory(
+            output_path + '/history',
+            '__'.join([scaler, feature_selector, estimator]),
+            SEARCHER_DEPENDENCIES.get(searcher, searcher),
+            settings['warm_start'],
+            searcher
+        ),
+        settings['early_stopping']
+    )
+
+    # Fit the pipeline
+    model = generate_model(pipeline[0], feature_names, x_search, y_search)
+
+    # Some searchers only know the number of fits once they have run
+    fits = getattr(pipeline[0].named_steps['estimator'], 'n_fits_', pipeline[1])
+
+    # Best cross validation score of the first scorer, to compare the estimators of a budgeted job
+    cv_results = pipeline[0].named_steps['estimator'].cv_results_
+    pipeline_result = {
+        'key': key,
+        'train_time': model['train_time'],
+        'cv_score': float(np.nanmax(cv_results['mean_test_' + scorers[0]])),
+        'results': []
+    }
+
+    for scorer in scorers:
+        key += '__' + scorer
+        candidates = refit_model(
+            pipeline[0], model['features'], estimator, scorer, x_train, y_train, settings['memory'])
+        fits += len([candidate for candidate in candidates if candidate['refit']])
+
+        for position, candidate in enumerate(candidates):
+            result = {
+                'key': key + '__' + str(position),
+                'scaler': SCALER_NAMES[scaler],
+                'feature_selector': FEATURE_SELECTOR_NAMES[feature_selector],
+                'algorithm': ESTIMATOR_NAMES[estimator],
+                'searcher': SEARCHER_NAMES[searcher],
+                'scorer': SCORER_NAMES[scorer]
+            }
+
+            print('\t#%d' % (position+1))
+            dump_model(candidate['best_estimator'], output_path + '/models/' + result['key'] + '.joblib')
+
+            # Each dataset is transformed and scored once for every metric
+            test_scores = score_model(model['features'], candidate['best_estimator'], pipeline[0], x_test)
+            generalization_scores = \
+                score_model(model['features'], candidate['best_estimator'], pipeline[0], x2)
+
+            result.update(generalization_report(
+                labels, y2, generalization_scores['predictions'], generalization_scores['probabilities']))
+            result.update({
+                'selected_features': list(model['selected_features']),
+                'feature_scores': model['feature_scores'],
+                'best_params': candidate['best_params']
+            })
+            roc_auc = compute_roc(y_test, test_scores['probabilities'])
+            result.update({
+              'test_fpr': roc_auc['fpr'],
+              'test_tpr': roc_auc['tpr'],
+              'training_roc_auc': roc_auc['roc_auc']
+            })
+            result['roc_delta'] = round(abs(result['roc_auc'] - result['training_roc_auc']), 4)
+            roc_auc = compute_roc(y2, generalization_scores['probabilities'])
+            result.update({
+              'generalization_fpr': roc_auc['fpr'],
+              'generalization_tpr': roc_auc['tpr']
+            })
+            result.update(compute_reliability(y2, generalization_scores['scores']))
+            result.update(compute_precision_recall(y2, generalization_scores['scores']))
+
+            pipeline_result['results'].append(result)
+
+    pipeline_result['fits'] = fits
+
+    return pipeline_result
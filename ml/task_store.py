@@ -0,0 +1,249 @@
+"""
+Store of the lifecycle of the training tasks: the web service records a
+task as it is queued and the workers as it starts, progresses and
+finishes. The pending tasks of a user are read from an index of the store
+rather than by inspecting (and waiting on) every worker.
+
+A SQLite database serves a single host (its locking does not hold across
+the hosts of a network filesystem), workers spread across hosts share a
+Redis store, the result backend when it is Redis.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Define the store of the training tasks shared by the web service and the workers, a Redis
+# URL or the path of a SQLite database (the result backend when it is Redis, a local database otherwise)
+TASK_STORE = os.getenv(
+    'TASK_STORE',
+    os.getenv('RESULT_BACKEND') if os.getenv('RESULT_BACKEND', '').startswith(('redis://', 'rediss://'))
+    else 'data/tasks.db'
+)
+
+# Define the columns returned for a pending task
+TASK_COLUMNS = [
+    'id', 'jobid', 'datasetid', 'label', 'parameters', 'state',
+    'current', 'total', 'eta', 'status', 'scheduled', 'queued', 'started'
+]
+
+# Stores opened by the current process, connections are not shared with forked processes
+_STORES = {}
+
+def open_store(path=TASK_STORE):
+    """Store of the current process for the provided path or URL, opened (and its schema created) once"""
+
+    key = (os.getpid(), path)
+    if key not in _STORES:
+        _STORES[key] = RedisTaskStore(path) if path.startswith(('redis://', 'rediss://')) else\
+            SQLiteTaskStore(path)
+
+    return _STORES[key]
+
+def task_queued(task_id, userid, jobid, datasetid, label, parameters, scheduled=None, path=TASK_STORE):
+    """Record a training task as queued, `scheduled` is the ETA of a task queued for later"""
+
+    open_store(path).insert({
+        'id': task_id,
+        'userid': userid,
+        'jobid': jobid,
+        'datasetid': datasetid,
+        'label': label,
+        'parameters': json.dumps(parameters),
+        'state': 'PENDING',
+        'current': 0,
+        'total': 1,
+        'scheduled': scheduled,
+        'queued': time.time()
+    })
+
+def task_started(task_id, path=TASK_STORE):
+    """Record a task as started (a redelivered task keeps its first start)"""
+
+    open_store(path).update(task_id, lambda task: {
+        'state': 'STARTED' if task['state'] == 'PENDING' else task['state'],
+        'started': task['started'] or time.time()
+    })
+
+def task_progress(task_id, current, total, eta=None, path=TASK_STORE):
+    """Record the progress of a task"""
+
+    open_store(path).update(task_id, lambda task: {
+        'state': task['state'] if task['state'] == 'REVOKED' else 'PROGRESS',
+        'current': current,
+        'total': total,
+        'eta': eta,
+        'started': task['started'] or time.time()
+    })
+
+def task_revoked(task_id, path=TASK_STORE):
+    """Record a task as revoked, it is finished once the worker running (or receiving) it stops it"""
+
+    open_store(path).update(task_id, lambda task: {'state': 'REVOKED'})
+
+def task_finished(task_id, state='SUCCESS', status='', path=TASK_STORE):
+    """Record a task as finished, whether it succeeded, failed or was revoked"""
+
+    open_store(path).update(task_id, lambda task: {'state': state, 'status': status, 'finished': time.time()})
+
+def is_revoked(task_id, path=TASK_STORE):
+    """Whether a task was revoked, whichever host it was revoked from"""
+
+    return open_store(path).state(task_id) == 'REVOKED'
+
+def pending_tasks(userid, path=TASK_STORE):
+    """Tasks of a user not finished yet, in the order they were queued"""
+
+    tasks = open_store(path).pending(userid)
+    for task in tasks:
+        task['parameters'] = json.loads(task['parameters'])
+
+    return tasks
+
+class SQLiteTaskStore:
+    """Tasks stored in a SQLite database, on a single host"""
+
+    def __init__(self, path):
+        if os.path.dirname(path) and not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Writers wait on each other rather than fail, the threads of a process share the connection in turn
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS tasks (id TEXT PRIMARY KEY, userid TEXT, jobid TEXT, datasetid TEXT, '
+            'label TEXT, parameters TEXT, state TEXT, current INTEGER, total INTEGER, eta REAL, status TEXT, '
+            'scheduled TEXT, queued REAL, started REAL, finished REAL)'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS pending_tasks ON tasks (userid, finished)')
+
+    def insert(self, task):
+        """Insert (or replace) a task"""
+
+        with self.lock:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO tasks (%s) VALUES (%s)' % (', '.join(task), ', '.join(['?'] * len(task))),
+                list(task.values())
+            )
+
+    def update(self, task_id, function):
+        """Update the fields `function` returns for a task not finished yet"""
+
+        with self.lock:
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                row = self.connection.execute(
+                    'SELECT state, started FROM tasks WHERE id = ? AND finished IS NULL', [task_id]).fetchone()
+
+                if row is not None:
+                    fields = function({'state': row[0], 'started': row[1]})
+                    self.connection.execute(
+                        'UPDATE tasks SET %s WHERE id = ?' % ', '.join(name + ' = ?' for name in fields),
+                        list(fields.values()) + [task_id]
+                    )
+            except Exception:
+                self.connection.execute('ROLLBACK')
+                raise
+
+            self.connection.execute('COMMIT')
+
+    def state(self, task_id):
+        """State of a task, None when it was never recorded"""
+
+        with self.lock:
+            row = self.connection.execute('SELECT state FROM tasks WHERE id = ?', [task_id]).fetchone()
+
+        return row[0] if row else None
+
+    def pending(self, userid):
+        """Tasks of a user not finished yet, in the order they were queued"""
+
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT %s FROM tasks WHERE userid = ? AND finished IS NULL ORDER BY queued' %
+                ', '.join(TASK_COLUMNS), [userid]
+            ).fetchall()
+
+        return [dict(zip(TASK_COLUMNS, row)) for row in rows]
+
+class RedisTaskStore:
+    """
+    Tasks stored in Redis, shared by workers across hosts: each task is a
+    hash and the tasks of a user not finished yet a sorted set (by the time
+    they were queued).
+    """
+
+    def __init__(self, url):
+        import redis
+
+        self.redis = redis
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+
+    def insert(self, task):
+        """Insert (or replace) a task"""
+
+        with self.client.pipeline() as pipeline:
+            pipeline.delete('task:' + task['id'])
+            pipeline.hset('task:' + task['id'], mapping=_encode(task))
+            pipeline.zadd('pending-tasks:' + task['userid'], {task['id']: task['queued']})
+            pipeline.execute()
+
+    def update(self, task_id, function):
+        """Update the fields `function` returns for a task not finished yet"""
+
+        key = 'task:' + task_id
+
+        with self.client.pipeline() as pipeline:
+            while True:
+                try:
+                    pipeline.watch(key)
+                    task = pipeline.hgetall(key)
+                    if not task or 'finished' in task:
+                        return
+
+                    fields = function({'state': task['state'], 'started': _decode('started', task.get('started'))})
+
+                    pipeline.multi()
+                    pipeline.hset(key, mapping=_encode(fields))
+                    if 'finished' in fields:
+                        pipeline.zrem('pending-tasks:' + task['userid'], task_id)
+                    pipeline.execute()
+                    return
+                except self.redis.WatchError:
+                    continue
+
+    def state(self, task_id):
+        """State of a task, None when it was never recorded"""
+
+        return self.client.hget('task:' + task_id, 'state')
+
+    def pending(self, userid):
+        """Tasks of a user not finished yet, in the order they were queued"""
+
+        with self.client.pipeline() as pipeline:
+            for task_id in self.client.zrange('pending-tasks:' + userid, 0, -1):
+                pipeline.hgetall('task:' + task_id)
+            tasks = [task for task in pipeline.execute() if task]
+
+        return [{
+            name: _decode(name, task.get(name)) for name in TASK_COLUMNS
+        } for task in tasks]
+
+def _encode(fields):
+    """Fields of a task as stored by Redis, which has no None (stored as an empty string)"""
+
+    return {name: '' if value is None else value for name, value in fields.items()}
+
+def _decode(name, value):
+    """Value of a task field read back from Redis"""
+
+    if value is None or value == '':
+        return None
+
+    if name not in ['current', 'total', 'eta', 'queued', 'started']:
+        return value
+
+    return int(value) if name in ['current', 'total'] else float(value)
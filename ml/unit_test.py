@@ -2,11 +2,46 @@
 Unit Tests
 """
 
-from .import_data import import_data
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from shutil import copyfile
+from tempfile import mkdtemp
+
+import numpy as np
+import pandas as pd
+import pytest
+from joblib import Memory, dump
+from sklearn.exceptions import FitFailedWarning
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import GaussianNB
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from .batching import PredictionBatcher
+from .budget import SearchBudget
+from .cost_model import RuntimeModel, fit_budget, longest_first, makespan, remaining_time
+from .evaluate import score_model
+from .import_data import cache_csv, import_csv, import_data, load_cache
 from .generalization import generalize
 from .model import generate_model
+from .model_registry import cache_info, dump_model, invalidate, load_model
+from .out_of_core import fit_incremental, sample_rows, share_arrays
 from .pipeline import generate_pipeline
+from .predict import combine_tandem, predict, predict_stream, vote
+from .processors.early_stopping import race_candidates
+from .processors.feature_selection import FEATURE_SELECTOR_NAMES
+from .processors.history import HistoryRandomizedSearchCV, SearchHistory, parameter_region
+from .processors.hyperparameters import HYPER_PARAMETER_RANGE
+from .processors.searchers import OPT_IN_SEARCHERS, SEARCHER_NAMES
 from .refit import refit_model
+from .results import create_result_store, load_result_store
+from .scheduler import schedule
+from .scoring import score_file
+from .search import find_best_model, list_job_pipelines, plan_job, run_staged_pipeline, stage_job
+from .task_store import is_revoked, pending_tasks, task_finished, task_progress, task_queued, task_revoked, task_started
+from .utils import decimate_points
 
 # Load the test data
 LABEL_COLUMN = 'Cancer'
@@ -15,6 +50,16 @@ LABEL_COLUMN = 'Cancer'
 X_TRAIN, X_TEST, Y_TRAIN, Y_TEST, X2, Y2, FEATURE_NAMES, _ = import_data(
     'sample-data/train.csv', 'sample-data/test.csv', LABEL_COLUMN)
 
+# Define a small job (a grid search of the logistic regression and naive Bayes for each scaler)
+JOB_PARAMETERS = {
+    'ignore_estimator': 'gb,knn,mlp,rf,svm',
+    'ignore_feature_selector': ','.join(name for name in FEATURE_SELECTOR_NAMES if name != 'none'),
+    'ignore_searcher': ','.join(name for name in SEARCHER_NAMES if name != 'grid'),
+    'ignore_scorer': 'roc_auc,f1_macro',
+    'ignore_shuffle': 'true'
+}
+JOB_ARGUMENTS = ('sample-data/train.csv', 'sample-data/test.csv', ['No Cancer', 'Cancer'], LABEL_COLUMN, JOB_PARAMETERS)
+
 def run_pipeline(scaler, feature_selector, estimator, scoring, searcher, shuffle):
     """Helper method to run unit tests"""
 
@@ -98,21 +143,21 @@ def test_support_vector_machine_with_standard_scaler():
     """Test SVM with standard scaler"""
 
     generalization = run_pipeline('std', 'none', 'svm', 'accuracy', 'grid', False)
-    assert generalization['accuracy'] == 0.9899
-    assert generalization['avg_sn_sp'] == 0.9941
-    assert generalization['f1'] == 0.9794
+    assert generalization['accuracy'] == 0.9933
+    assert generalization['avg_sn_sp'] == 0.9961
+    assert generalization['f1'] == 0.9861
     assert generalization['sensitivity'] == 1.0
-    assert generalization['specificity'] == 0.9883
+    assert generalization['specificity'] == 0.9922
 
 def test_support_vector_machine_with_standard_scaler_and_roc_auc():
     """Test SVM with standard scaler and ROC AUC scoring"""
 
     generalization = run_pipeline('std', 'none', 'svm', 'roc_auc', 'grid', False)
-    assert generalization['accuracy'] == 0.9865
-    assert generalization['avg_sn_sp'] == 0.9922
-    assert generalization['f1'] == 0.9728
+    assert generalization['accuracy'] == 0.9899
+    assert generalization['avg_sn_sp'] == 0.9941
+    assert generalization['f1'] == 0.9794
     assert generalization['sensitivity'] == 1.0
-    assert generalization['specificity'] == 0.9844
+    assert generalization['specificity'] == 0.9883
 
 def test_support_vector_machine_with_standard_scaler_with_select_75():
     """Test SVM with standard scaler and select percentile 75%"""
@@ -123,3 +168,424 @@ def test_support_vector_machine_with_standard_scaler_with_select_75():
     assert generalization['f1'] == 0.9663
     assert generalization['sensitivity'] == 1.0
     assert generalization['specificity'] == 0.9805
+
+def test_logistic_regression_with_halving_grid_search():
+    """Test LR with successive halving reports the fits it performs"""
+
+    pipeline = generate_pipeline('std', 'none', 'lr', Y_TRAIN, ['accuracy', 'roc_auc'], 'halving-grid', False)
+    generate_model(pipeline[0], FEATURE_NAMES, X_TRAIN, Y_TRAIN)
+    results = pipeline[0].named_steps['estimator'].cv_results_
+    assert len(results['params']) * 10 == pipeline[1]
+    assert results['n_resources'][results['rank_test_roc_auc'].argmin()] == max(results['n_resources'])
+
+def test_logistic_regression_with_warm_started_bayesian_search():
+    """Test LR with the bayesian search evaluates the best parameters of an earlier job first"""
+
+    location = mkdtemp()
+    previous = generate_pipeline('std', 'none', 'lr', Y_TRAIN, ['accuracy', 'roc_auc'], 'random', False,
+                                 history=SearchHistory(location, 'std__none__lr', 'random'))
+    generate_model(previous[0], FEATURE_NAMES, X_TRAIN, Y_TRAIN)
+    previous = previous[0].named_steps['estimator'].cv_results_
+
+    pipeline = generate_pipeline('std', 'none', 'lr', Y_TRAIN, ['accuracy', 'roc_auc'], 'bayes', False,
+                                 history=SearchHistory(mkdtemp(), 'std__none__lr', 'bayes', [location]))
+    generate_model(pipeline[0], FEATURE_NAMES, X_TRAIN, Y_TRAIN)
+    search = pipeline[0].named_steps['estimator']
+    assert search.n_fits_ == pipeline[1] == 300
+    assert search.cv_results_['params'][0] == previous['params'][previous['rank_test_roc_auc'].argmin()]
+
+def test_second_random_search_samples_unvisited_regions():
+    """Test the random search is reproducible and a search building upon it avoids the regions it visited"""
+
+    distributions = HYPER_PARAMETER_RANGE['random']['svm']
+    first = HistoryRandomizedSearchCV(None, distributions, n_iter=50, random_state=0)._sample_candidates([])
+    assert first == HistoryRandomizedSearchCV(None, distributions, n_iter=50, random_state=0)._sample_candidates([])
+
+    second = HistoryRandomizedSearchCV(None, distributions, n_iter=50, random_state=0)._sample_candidates(
+        [{'params': params} for params in first])
+    regions = [parameter_region(params, distributions) for params in second]
+    assert second and len(set(regions)) == len(regions)
+    assert not {parameter_region(params, distributions) for params in first} & set(regions)
+
+def test_search_run_again_replaces_its_history():
+    """Test a searcher run again replaces its entries, the searchers sharing its history still see them"""
+
+    location = mkdtemp()
+    SearchHistory(location, 'std__none__lr', 'random').append([{'params': {'C': 1}}, {'params': {'C': 2}}])
+    SearchHistory(location, 'std__none__lr', 'random').append([{'params': {'C': 3}}])
+
+    assert SearchHistory(location, 'std__none__lr', 'random').load() == []
+    assert [entry['params'] for entry in SearchHistory(location, 'std__none__lr', 'random', source='random2').load()] == [{'C': 3}]
+
+def test_support_vector_machine_with_early_stopping():
+    """Test SVM with early stopping prunes candidates without changing the best candidate"""
+
+    results = {}
+    for early_stopping in [False, True]:
+        pipeline = generate_pipeline('std', 'none', 'svm', Y_TRAIN, ['accuracy', 'roc_auc'], 'grid', False,
+                                     early_stopping=early_stopping)
+        generate_model(pipeline[0], FEATURE_NAMES, X_TRAIN, Y_TRAIN)
+        results[early_stopping] = pipeline[0].named_steps['estimator']
+
+    assert results[True].n_fits_ < 400
+    assert results[True].cv_results_['pruned'].sum() > 0
+    for scorer in ['accuracy', 'roc_auc']:
+        assert results[True].cv_results_['params'][results[True].cv_results_['rank_test_%s' % scorer].argmin()] ==\
+            results[False].cv_results_['params'][results[False].cv_results_['rank_test_%s' % scorer].argmin()]
+
+def test_early_stopping_reports_failed_fits():
+    """Test candidates failing to fit are reported, and the race fails when every candidate failed"""
+
+    with pytest.warns(FitFailedWarning):
+        results, _ = race_candidates(
+            LogisticRegression(), [{'C': 1.0}, {'C': -1.0}], X_TRAIN, Y_TRAIN, 5, {'accuracy': 'accuracy'})
+    assert results['rank_test_accuracy'].tolist() == [1, 2]
+
+    with pytest.raises(ValueError, match='All the 2 candidates failed'):
+        race_candidates(LogisticRegression(), [{'C': -1.0}, {'C': -2.0}], X_TRAIN, Y_TRAIN, 5, {'accuracy': 'accuracy'})
+
+def test_logistic_regression_refits_shared_between_scorers():
+    """Test LR refits each distinct set of parameters once"""
+
+    memory = Memory(mkdtemp(), verbose=0)
+    pipeline = generate_pipeline('none', 'none', 'lr', Y_TRAIN, ['accuracy', 'roc_auc'], 'grid', False)
+    model = generate_model(pipeline[0], FEATURE_NAMES, X_TRAIN, Y_TRAIN)
+    accuracy = refit_model(pipeline[0], model['features'], 'lr', 'accuracy', X_TRAIN, Y_TRAIN, memory)
+    roc_auc = refit_model(pipeline[0], model['features'], 'lr', 'roc_auc', X_TRAIN, Y_TRAIN, memory)
+
+    assert all(candidate['refit'] for candidate in accuracy)
+    for candidate in roc_auc:
+        assert candidate['refit'] == (candidate['best_params'] not in [item['best_params'] for item in accuracy])
+
+def test_support_vector_machine_predictions_follow_probabilities():
+    """Test SVM predictions are derived from the probabilities rather than the decision function"""
+
+    pipeline = generate_pipeline('std', 'none', 'svm', Y_TRAIN, ['roc_auc'], 'grid', False)
+    model = generate_model(pipeline[0], FEATURE_NAMES, X_TRAIN, Y_TRAIN)
+    model.update(refit_model(pipeline[0], model['features'], 'svm', 'roc_auc', X_TRAIN, Y_TRAIN)[0])
+    scores = score_model(model['features'], model['best_estimator'], pipeline[0], X2)
+
+    probabilities = model['best_estimator'].predict_proba(pipeline[0].named_steps['scaler'].transform(X2))
+    assert (scores['predictions'] == probabilities.argmax(axis=1)).all()
+    assert 0 <= min(scores['scores']) and max(scores['scores']) <= 1
+
+def test_opt_in_searchers():
+    """Test the opt-in searchers only run when a job sets which searchers it ignores"""
+
+    searchers = {pipeline[3] for pipeline in list_job_pipelines({})[0]}
+    assert searchers and not searchers & set(OPT_IN_SEARCHERS)
+    assert {pipeline[3] for pipeline in list_job_pipelines({'ignore_searcher': ''})[0]} == set(SEARCHER_NAMES)
+
+def test_decimate_points():
+    """Test curve decimation keeps the corners within the tolerance and budget"""
+
+    x = [0, .1, .2, .3, .4, .5, 1]
+    y = [0, .5, .6, .7, .8, .9, 1]
+
+    assert decimate_points(x, y) == [(0, .1, .2, .3, .4, .5, 1), (0, .5, .6, .7, .8, .9, 1)]
+    assert decimate_points(x, y, .05) == [(0, .1, .5, 1), (0, .5, .9, 1)]
+    assert decimate_points(x, y, 0, 3) == [(0, .1, 1), (0, .5, 1)]
+
+def test_result_store():
+    """Test results are appended with typed columns and curves loaded on demand"""
+
+    result_store = create_result_store(mkdtemp())
+    for index in range(2):
+        result_store.append([{
+            'key': 'none__none__lr__grid__roc_auc__%d' % index,
+            'roc_auc': .99,
+            'tp': 41,
+            'sn_95_ci': [.914, 1],
+            'npv_95_ci': '',
+            'best_params': {'C': 1},
+            'test_fpr': [0, .5, 1]
+        }])
+
+    results = result_store.load()
+    assert len(results) == 2 and results[1]['key'] == 'none__none__lr__grid__roc_auc__1'
+    assert results[0]['roc_auc'] == .99 and results[0]['tp'] == 41
+    assert results[0]['sn_95_ci'] == '[0.914, 1]' and results[0]['npv_95_ci'] is None
+    assert results[0]['best_params'] == "{'C': 1}" and results[0]['test_fpr'] == '[0, 0.5, 1]'
+    assert result_store.load(curves=False)[0] == {key: value for key, value in results[0].items() if key != 'test_fpr'}
+
+    result_store.create_indices()
+    assert result_store.load(['key'], sort='key', limit=1, offset=1) == [{'key': results[0]['key']}]
+    assert result_store.count({'key': [results[1]['key']]}) == 1
+    result_store.close()
+
+def test_model_registry():
+    """Test exported pipelines are cached until they are replaced or invalidated"""
+
+    path = mkdtemp() + '/pipeline.joblib'
+    dump_model({'version': 1, 'coefficients': np.arange(1024.)}, path)
+    info = cache_info()
+
+    assert load_model(path) is load_model(path)
+    assert isinstance(load_model(path)['coefficients'], np.memmap)
+    assert cache_info()['hits'] == info['hits'] + 2 and cache_info()['misses'] == info['misses'] + 1
+
+    dump({'version': 2}, path)
+    os.utime(path, ns=(0, 0))
+    assert load_model(path) == {'version': 2}
+
+    invalidate(os.path.dirname(path))
+    assert cache_info()['entries'] == info['entries']
+
+def test_prediction_batcher():
+    """Test concurrent predictions are batched without changing their replies"""
+
+    path = mkdtemp() + '/pipeline'
+    dump_model(Pipeline([
+        ('scaler', StandardScaler()),
+        ('estimator', LogisticRegression())
+    ]).fit(X_TRAIN, Y_TRAIN), path + '.joblib')
+
+    batcher = PredictionBatcher(window=50, size=4)
+    requests = [([row], .5 if index % 2 else .3) for index, row in enumerate(X2[:8].tolist())]
+    with ThreadPoolExecutor(8) as executor:
+        replies = list(executor.map(lambda request: batcher.predict(request[0], path, request[1]), requests))
+
+    assert replies == [predict(data, path, threshold) for data, threshold in requests]
+
+    # A malformed request fails alone, the others of its batch are still scored
+    requests[1] = ([['invalid'] * len(requests[1][0][0])], .5)
+    with ThreadPoolExecutor(4) as executor:
+        futures = [executor.submit(batcher.predict, data, path, threshold) for data, threshold in requests[:4]]
+
+    assert isinstance(futures[1].exception(), ValueError)
+    assert [futures[index].result() for index in [0, 2, 3]] == [predict(requests[index][0], path, requests[index][1]) for index in [0, 2, 3]]
+
+def test_ensemble_and_tandem_combination():
+    """Test the hard vote and tandem combination of the models' outputs"""
+
+    positives = np.array([[.9, .2, .6, .4], [.8, .6, .1, .3], [.3, .7, .2, .5]])
+    assert vote(np.stack([1 - positives, positives], axis=2), 'hard')['predicted'] == [1, 1, 0, 0]
+
+    npv_reply = {'predicted': [0, 1, 1], 'probability': [.9, .7, .8]}
+    ppv_reply = {'predicted': [1, 1, 0], 'probability': [.6, .95, .85]}
+    assert combine_tandem(npv_reply, ppv_reply) == {'predicted': [0, 1, -1], 'probability': [.9, .95, .85]}
+
+def test_predict_stream():
+    """Test files are scored chunk by chunk as CSV or newline delimited JSON"""
+
+    path = mkdtemp() + '/pipeline'
+    dump_model(Pipeline([('estimator', LogisticRegression())]).fit(X_TRAIN, Y_TRAIN), path + '.joblib')
+    data = pd.DataFrame(X2[:25], columns=FEATURE_NAMES)
+    reply = predict(X2[:25].tolist(), path)
+
+    chunks = list(predict_stream(StringIO(data.to_csv(index=False)), path, chunk_size=10))
+    assert len(chunks) == 3
+    scored = pd.read_csv(StringIO(''.join(chunks)))
+    assert scored['prediction'].tolist() == reply['predicted'] and len(scored.columns) == len(FEATURE_NAMES) + 2
+
+    lines = ''.join(predict_stream(StringIO(data.to_csv(index=False)), path, .3, output_format='ndjson')).splitlines()
+    assert [json.loads(line)['prediction'] for line in lines] == predict(X2[:25].tolist(), path, .3)['predicted']
+
+def test_score_file():
+    """Test a file scored in partitions by a pool of processes matches the streamed scores"""
+
+    folder = mkdtemp()
+    dump_model(Pipeline([('estimator', LogisticRegression())]).fit(X_TRAIN, Y_TRAIN), folder + '/pipeline.joblib')
+    pd.DataFrame(X2, columns=FEATURE_NAMES).to_csv(folder + '/input.csv', index=False)
+
+    progress = []
+    score_file(folder + '/input.csv', folder + '/pipeline', folder + '/output.csv', n_jobs=2,
+               partition_size=2048, update_function=lambda x, y: progress.append((x, y)))
+
+    with open(folder + '/input.csv') as input_file, open(folder + '/output.csv') as output_file:
+        assert output_file.read() == ''.join(predict_stream(input_file, folder + '/pipeline'))
+    assert len(progress) > 1 and progress[-1][0] == progress[-1][1]
+
+    # Quoted fields spanning lines are never split across partitions
+    data = pd.DataFrame(X2, columns=FEATURE_NAMES).assign(note=['first line\n"second" line'] * len(X2))
+    data.to_csv(folder + '/input.csv', index=False)
+    score_file(folder + '/input.csv', folder + '/pipeline', folder + '/output.csv', features=FEATURE_NAMES,
+               n_jobs=2, partition_size=2048)
+
+    # (the probabilities of rows batched differently may differ in their last digits)
+    with open(folder + '/input.csv') as input_file:
+        streamed = pd.read_csv(StringIO(''.join(predict_stream(input_file, folder + '/pipeline', features=FEATURE_NAMES))))
+    scored = pd.read_csv(folder + '/output.csv')
+    assert scored.drop(columns='probability').equals(streamed.drop(columns='probability'))
+    assert np.allclose(scored['probability'], streamed['probability'])
+
+    # A file without any row is scored to its header
+    data[:0].to_csv(folder + '/input.csv', index=False)
+    score_file(folder + '/input.csv', folder + '/pipeline', folder + '/output.csv', features=FEATURE_NAMES)
+
+    with open(folder + '/output.csv') as output_file:
+        assert output_file.read().rstrip('\n').split(',') == FEATURE_NAMES + ['note', 'prediction', 'probability']
+
+def test_dataset_cache():
+    """Test a cached dataset imports the same data as its CSV and is invalidated by changes"""
+
+    path = mkdtemp() + '/train.csv'
+    copyfile('sample-data/train.csv', path)
+    cache_csv(path, LABEL_COLUMN)
+
+    x, y, feature_names, negative_count, positive_count = import_csv(path, LABEL_COLUMN)
+    expected = import_csv('sample-data/train.csv', LABEL_COLUMN)
+    assert isinstance(x, np.memmap) and (x == expected[0]).all() and (y.to_numpy() == expected[1].to_numpy()).all()
+    assert [feature_names, negative_count, positive_count] == expected[2:]
+
+    assert load_cache(path, 'other') is None
+    with open(path, 'a') as csv_file:
+        csv_file.write('\n')
+    assert load_cache(path, LABEL_COLUMN) is None
+
+def test_out_of_core_training():
+    """Test shared arrays, the stratified search sample and the incremental refit"""
+
+    x_train, y_train = share_arrays(mkdtemp(), [X_TRAIN, Y_TRAIN.to_numpy()], 0)
+    assert isinstance(x_train, np.memmap) and (x_train == X_TRAIN).all() and (y_train == Y_TRAIN).all()
+
+    x_search, y_search = sample_rows(x_train, y_train, 100)
+    assert len(x_search) == 100 and abs(y_search.mean() - y_train.mean()) < .01
+    assert sample_rows(x_train, y_train, 0)[0] is x_train
+
+    scaler = StandardScaler().fit(x_search)
+    model = fit_incremental(GaussianNB(), x_train, y_train, scaler.transform, 50)
+    expected = GaussianNB().fit(scaler.transform(x_train), y_train)
+    assert np.allclose(model.theta_, expected.theta_) and (model.predict(scaler.transform(X2)) == expected.predict(scaler.transform(X2))).all()
+
+def create_job_folder():
+    """Create an empty job folder"""
+
+    folder = mkdtemp()
+    os.makedirs(folder + '/models')
+    with open(folder + '/metadata.json', 'w') as metafile:
+        json.dump({}, metafile)
+
+    return folder
+
+def test_resume_interrupted_job():
+    """Test an interrupted job resumes after its last completed pipeline with the same report"""
+
+    def interrupt(current, *_):
+        if current == 2:
+            raise KeyboardInterrupt
+
+    completed, interrupted = create_job_folder(), create_job_folder()
+
+    find_best_model(*JOB_ARGUMENTS, completed)
+    try:
+        find_best_model(*JOB_ARGUMENTS, interrupted, interrupt)
+    except KeyboardInterrupt:
+        pass
+
+    progress = []
+    find_best_model(*JOB_ARGUMENTS, interrupted, lambda x, y, z: progress.append(x))
+    assert progress[0] == 2 and progress[-1] == 6
+
+    with open(completed + '/report.csv') as completed_report, open(interrupted + '/report.csv') as interrupted_report:
+        assert completed_report.read() == interrupted_report.read()
+    assert load_result_store(interrupted).count() == load_result_store(completed).count()
+
+def test_staged_job():
+    """Test the pipelines of a staged job run separately report as the job run at once does"""
+
+    completed, staged = create_job_folder(), create_job_folder()
+    find_best_model(*JOB_ARGUMENTS, completed)
+
+    size = stage_job(*JOB_ARGUMENTS[:2], LABEL_COLUMN, staged)
+    pipelines, _, _ = plan_job(JOB_PARAMETERS, staged, size)
+    assert run_staged_pipeline(0, JOB_ARGUMENTS[2], LABEL_COLUMN, dict(JOB_PARAMETERS, time_budget='1e-9'), staged, 1) == 0
+    assert os.listdir(staged + '/pipelines') == []
+    fits = [run_staged_pipeline(index, JOB_ARGUMENTS[2], LABEL_COLUMN, JOB_PARAMETERS, staged, 1) for index in reversed(range(len(pipelines)))]
+    assert run_staged_pipeline(0, JOB_ARGUMENTS[2], LABEL_COLUMN, JOB_PARAMETERS, staged, 1) == fits[-1]
+
+    find_best_model(*JOB_ARGUMENTS, staged, staged=True)
+    with open(completed + '/report.csv') as completed_report, open(staged + '/report.csv') as staged_report:
+        assert completed_report.read() == staged_report.read()
+    assert not os.path.exists(staged + '/pipelines') and not os.path.exists(staged + '/arrays')
+
+def test_runtime_model():
+    """Test the run time learned per pipeline, the longest first ordering and the time budget"""
+
+    records = [
+        {'estimator': 'lr', 'feature_selector': 'none', 'searcher': 'grid', 'size': 1000, 'train_time': 2},
+        {'estimator': 'lr', 'feature_selector': 'none', 'searcher': 'grid', 'size': 4000, 'train_time': 8},
+        {'estimator': 'lr', 'feature_selector': 'none', 'searcher': 'random', 'size': 1000, 'train_time': .5},
+        {'estimator': 'knn', 'feature_selector': 'none', 'searcher': 'grid', 'size': 1000, 'train_time': 1}
+    ]
+    model = RuntimeModel(records)
+
+    assert round(model.predict(('lr', 'std', 'none', 'grid'), 2000), 4) == 4
+    assert round(model.predict(('lr', 'std', 'pca-80', 'random'), 2000), 4) == 1
+    assert model.predict(('knn', 'none', 'none', 'hyperband'), 1000) == 1
+    assert RuntimeModel().predict(('lr', 'none', 'none', 'grid'), 1000) is None
+
+    assert longest_first([1, 3, 2]) == [1, 2, 0] and longest_first([1, None]) == [0, 1]
+    assert makespan([3, 2, 2, 1], 2) == 4 and remaining_time([3, 2, 2, 1], 2, 1.5) == 6
+    assert remaining_time([1, None]) is None
+
+    pipelines = [('lr', 'none', 'none', 'grid'), ('knn', 'none', 'none', 'grid')]
+    planned, costs = fit_budget(pipelines, model, 1000, 3, ['grid', 'random'])
+    assert planned == [('lr', 'none', 'none', 'random'), ('knn', 'none', 'none', 'grid')] and np.allclose(costs, [.5, 1])
+    assert fit_budget(pipelines, model, 1000, .6, ['grid', 'random'])[0] == [('lr', 'none', 'none', 'random')]
+
+    # Pipelines are never downgraded to a searcher the job ignores
+    assert fit_budget(pipelines, model, 1000, 3, ['grid'])[0] == [('knn', 'none', 'none', 'grid')]
+
+def test_search_budget():
+    """Test estimators are probed first, then ranked by score, until the fit budget is spent"""
+
+    pipelines = [('lr', 'none', 'none', 'grid'), ('lr', 'std', 'none', 'grid'), ('knn', 'none', 'none', 'grid'), ('knn', 'std', 'none', 'grid')]
+    budget = SearchBudget(pipelines, [2, 1, 3, 4], [100, 100, 100, 100], fit_budget=250)
+
+    # A pipeline is not started when its own fits exceed the budget left, even the first of its estimator
+    assert SearchBudget(pipelines, [2, 1, 3, 4], [100, 300, 100, 100], fit_budget=250).choose([1]) is None
+    assert budget.choose([0, 1, 2, 3]) == 1
+    assert budget.choose([0, 2, 3]) == 2
+    budget.record(1, {'cv_score': .8, 'fits': 100, 'train_time': 1})
+    budget.record(2, {'cv_score': .9, 'fits': 100, 'train_time': 3})
+
+    assert budget.choose([0, 3]) is None
+    budget.fit_budget = 0
+    assert budget.choose([0, 3]) == 3
+
+    # The results of an adaptive schedule are yielded as they complete
+    chosen = []
+    choose = lambda ready: chosen.append(max(ready)) or (chosen[-1] if len(chosen) <= 3 else None)
+    assert list(schedule(abs, [-1, -2, -3, -4], n_jobs=1, dependencies={3: 0}, choose=choose)) == [(2, 3), (1, 2), (0, 1)]
+
+    # A task waits on its dependency whatever its index, even when run sequentially
+    assert list(schedule(abs, [-1, -2, -3], dependencies={0: 2}, order=[0, 1, 2])) == [(1, 2), (2, 3), (0, 1)]
+
+def test_budgeted_job():
+    """Test a job within a fit budget reports the pipelines it ran and lists the skipped ones"""
+
+    folder = create_job_folder()
+    find_best_model(*JOB_ARGUMENTS[:4], dict(JOB_PARAMETERS, fit_budget='400'), folder)
+
+    with open(folder + '/metadata.json') as metafile:
+        metadata = json.load(metafile)
+    report = pd.read_csv(folder + '/report.csv')
+
+    assert 0 < sum(metadata['fits'].values()) <= 400 and metadata['budget']['skipped']
+    assert len(set(report['key'].str.rsplit('__', n=2).str[0])) + len(metadata['budget']['skipped']) == 6
+
+def test_task_store():
+    """Test the pending tasks of a user follow the lifecycle recorded in the task store"""
+
+    path = mkdtemp() + '/tasks.db'
+    task_queued('a', 'user', 'job-a', 'dataset', 'Cancer', {'ignore_estimator': 'svm'}, path=path)
+    task_queued('b', 'user', 'job-b', 'dataset', 'Cancer', {}, '2026-01-01T00:00:00', path=path)
+    task_queued('c', 'other', 'job-c', 'dataset', 'Cancer', {}, path=path)
+
+    task_started('a', path=path)
+    task_progress('a', 3, 10, 42.5, path=path)
+    pending = pending_tasks('user', path=path)
+    assert [task['id'] for task in pending] == ['a', 'b'] and pending[0]['parameters'] == {'ignore_estimator': 'svm'}
+    assert (pending[0]['state'], pending[0]['current'], pending[0]['total'], pending[0]['eta']) == ('PROGRESS', 3, 10, 42.5)
+    assert pending[1]['started'] is None and pending[1]['scheduled'] == '2026-01-01T00:00:00'
+
+    # A revoked task stays pending until its worker stops it, a finished task is never updated again
+    task_revoked('a', path=path)
+    task_progress('a', 4, 10, path=path)
+    assert pending_tasks('user', path=path)[0]['state'] == 'REVOKED' and is_revoked('a', path=path)
+    task_finished('a', 'REVOKED', path=path)
+    assert is_revoked('a', path=path) and not is_revoked('b', path=path)
+    task_finished('b', path=path)
+    task_started('b', path=path)
+    assert not pending_tasks('user', path=path) and len(pending_tasks('other', path=path)) == 1
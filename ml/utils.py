@@ -2,6 +2,9 @@
 Utilities
 """
 
+import os
+from heapq import heappop, heappush
+
 import numpy as np
 
 from .processors.estimators import ESTIMATOR_NAMES
@@ -10,6 +13,12 @@ from .processors.scalers import SCALER_NAMES
 from .processors.searchers import SEARCHER_NAMES
 from .processors.scorers import SCORER_NAMES
 
+# Define the distance under which the points of a curve are removed
+DECIMATE_TOLERANCE = float(os.getenv('DECIMATE_TOLERANCE', 0))
+
+# Define the maximum number of points kept for a curve (no limit when 0)
+MAX_CURVE_POINTS = int(os.getenv('MAX_CURVE_POINTS', 0)) or None
+
 def model_key_to_name(key):
     """"Resolve key name to descriptive name"""
 
@@ -26,34 +35,59 @@ def explode_key(key):
 
     return (key.split('__') + [None])[:5]
 
-def decimate_points(x, y):
+def decimate_points(x, y, epsilon=DECIMATE_TOLERANCE, max_points=MAX_CURVE_POINTS):
     """Removes unneeded points from a curve"""
 
-    return list(zip(*rdp(list(zip(x, y)))))
+    return list(zip(*rdp(np.column_stack((x, y)), epsilon, max_points)))
 
 def line_dists(points, start, end):
+    """Distance of each point to the line going through the start and end"""
+
     if np.all(start == end):
         return np.linalg.norm(points - start, axis=1)
 
     vec = end - start
-    cross = np.cross(vec, start - points)
+    offsets = start - points
+    cross = vec[0] * offsets[:, 1] - vec[1] * offsets[:, 0]
     return np.divide(abs(cross), np.linalg.norm(vec))
 
+def rdp(M, epsilon=0, max_points=None):
+    """
+    Ramer-Douglas-Peucker simplification of a curve, keeping the points
+    further than `epsilon` from the simplified curve. Segments are split
+    from the furthest point first so at most `max_points` points are kept.
+    """
 
-def rdp(M, epsilon=0):
-    M = np.array(M)
-    start, end = M[0], M[-1]
-    dists = line_dists(M, start, end)
+    M = np.asarray(M, dtype=float)
+    if len(M) < 3:
+        return M[[0, -1]]
 
-    index = np.argmax(dists)
-    dmax = dists[index]
+    keep = np.zeros(len(M), dtype=bool)
+    keep[[0, -1]] = True
+    kept = 2
 
-    if dmax > epsilon:
-        result1 = rdp(M[:index + 1], epsilon)
-        result2 = rdp(M[index:], epsilon)
+    # Pending segments as (-distance, start, end, index of the furthest point)
+    segments = []
+    _push_segment(segments, M, 0, len(M) - 1)
 
-        result = np.vstack((result1[:-1], result2))
-    else:
-        result = np.array([start, end])
+    while segments and (max_points is None or kept < max_points):
+        distance, start, end, index = heappop(segments)
+        if -distance <= epsilon:
+            break
 
-    return result
\ No newline at end of file
+        keep[index] = True
+        kept += 1
+        _push_segment(segments, M, start, index)
+        _push_segment(segments, M, index, end)
+
+    return M[keep]
+
+def _push_segment(segments, M, start, end):
+    """Queue a segment with its furthest point, when it has inner points"""
+
+    if end - start < 2:
+        return
+
+    dists = line_dists(M[start + 1:end], M[start], M[end])
+    index = np.argmax(dists)
+    heappush(segments, (-dists[index], start, end, start + 1 + index))
@@ -0,0 +1,96 @@
+"""
+Benchmark the ensemble hard vote and the tandem combination against their
+previous row by row implementations using synthetic model outputs.
+
+Usage: python scripts/benchmark_predict.py [rows ...]
+"""
+
+import os
+import sys
+from timeit import default_timer as timer
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.predict import combine_tandem, vote
+
+# Define the largest test set the previous implementations are timed on
+MAX_PREVIOUS_ROWS = 100000
+
+def previous_hard_vote(probabilities):
+    """Previous hard vote, counting the votes of each row in Python"""
+
+    predictions = np.argmax(probabilities, axis=2).T
+    return np.apply_along_axis(lambda x: np.argmax(np.bincount(x)), axis=1, arr=predictions)
+
+def previous_combine_tandem(npv_reply, ppv_reply):
+    """Previous tandem combination, using row wise DataFrame operations"""
+
+    npv_reply = pd.DataFrame(npv_reply)
+    ppv_reply = pd.DataFrame(ppv_reply)
+
+    ppv_reply['predicted'] = ppv_reply.apply(lambda row: row['predicted'] if row['predicted'] > 0 else -1, axis=1)
+    predicted = npv_reply.apply(lambda row: ppv_reply.iloc[row.name]['predicted'] if row['predicted'] > 0 else row['predicted'], axis=1)
+    npv_reply['probability'] = npv_reply.apply(lambda row: ppv_reply.iloc[row.name]['probability'] if row['predicted'] > 0 else row['probability'], axis=1)
+    npv_reply['predicted'] = predicted
+
+    return {
+        'predicted': npv_reply['predicted'].to_list(),
+        'probability': npv_reply['probability'].to_list()
+    }
+
+def reply(probabilities):
+    """Reply of a single model for the positive class probabilities"""
+
+    predicted = (probabilities > .5).astype(int)
+    return {
+        'predicted': predicted.tolist(),
+        'probability': np.where(predicted, probabilities, 1 - probabilities).tolist()
+    }
+
+def same(previous, current):
+    """Whether both implementations returned the same predictions (and probabilities)"""
+
+    if isinstance(previous, dict):
+        return all(same(previous[name], current[name]) for name in previous)
+
+    return np.allclose(np.asarray(previous, dtype=float), np.asarray(current, dtype=float))
+
+def measure(function, *args):
+    """Time a single call"""
+
+    start = timer()
+    result = function(*args)
+    return (result, timer() - start)
+
+def main(sizes, n_models=5):
+    """Run the benchmark for every test set size"""
+
+    random_state = np.random.RandomState(0)
+
+    print('%-8s %-10s %12s %12s %10s' % ('rows', 'kernel', 'previous', 'vectorized', 'speedup'))
+
+    for rows in sizes:
+        positives = random_state.uniform(size=(n_models, rows))
+        probabilities = np.stack([1 - positives, positives], axis=2)
+        npv_reply, ppv_reply = reply(positives[0]), reply(positives[1])
+
+        for name, function, previous_function, args in [
+                ('hard vote', lambda *args: vote(*args, 'hard')['predicted'], previous_hard_vote, (probabilities,)),
+                ('tandem', combine_tandem, previous_combine_tandem, (npv_reply, ppv_reply))]:
+            current, current_time = measure(function, *args)
+
+            if rows > MAX_PREVIOUS_ROWS:
+                print('%-8d %-10s %12s %11.4fs %10s' % (rows, name, '-', current_time, '-'))
+                continue
+
+            previous, previous_time = measure(previous_function, *args)
+            assert same(previous, current)
+
+            print('%-8d %-10s %11.4fs %11.4fs %9.0fx' % (
+                rows, name, previous_time, current_time, previous_time / current_time))
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or [1000, 10000, 100000, 1000000])
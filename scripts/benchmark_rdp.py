@@ -0,0 +1,84 @@
+"""
+Benchmark the curve decimation against the previous recursive implementation
+using ROC and precision recall curves of synthetic test sets.
+
+Usage: python scripts/benchmark_rdp.py [rows ...]
+"""
+
+import os
+import sys
+from timeit import default_timer as timer
+
+import numpy as np
+from sklearn.metrics import precision_recall_curve, roc_curve
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.utils import decimate_points
+
+def recursive_rdp(M, epsilon=0):
+    """Previous recursive implementation"""
+
+    M = np.array(M)
+    start, end = M[0], M[-1]
+
+    if np.all(start == end):
+        dists = np.linalg.norm(M - start, axis=1)
+    else:
+        vec = end - start
+        offsets = start - M
+        dists = np.divide(abs(vec[0] * offsets[:, 1] - vec[1] * offsets[:, 0]), np.linalg.norm(vec))
+
+    index = np.argmax(dists)
+
+    if dists[index] > epsilon:
+        return np.vstack((recursive_rdp(M[:index + 1], epsilon)[:-1], recursive_rdp(M[index:], epsilon)))
+
+    return np.array([start, end])
+
+def recursive_decimate_points(x, y):
+    """Previous decimation, rounding each point in Python"""
+
+    x = [round(num, 4) for num in list(x)]
+    y = [round(num, 4) for num in list(y)]
+    return list(zip(*recursive_rdp(list(zip(x, y)))))
+
+def curves(rows, random_state):
+    """ROC and precision recall curves of a noisy classifier"""
+
+    y = random_state.randint(0, 2, rows)
+    probabilities = np.clip(y * .3 + random_state.normal(.35, .25, rows), 0, 1)
+
+    fpr, tpr, _ = roc_curve(y, probabilities)
+    precision, recall, _ = precision_recall_curve(y, probabilities)
+    return {'roc': (fpr, tpr), 'precision recall': (recall, precision)}
+
+def measure(function, *args):
+    """Time a single call"""
+
+    start = timer()
+    result = function(*args)
+    return (result, timer() - start)
+
+def main(sizes):
+    """Run the benchmark for every test set size"""
+
+    random_state = np.random.RandomState(0)
+    sys.setrecursionlimit(100000)
+
+    print('%-8s %-17s %8s %12s %12s %10s %10s' %
+          ('rows', 'curve', 'points', 'recursive', 'iterative', 'kept', 'budget 100'))
+
+    for rows in sizes:
+        for name, (x, y) in curves(rows, random_state).items():
+            previous, previous_time = measure(recursive_decimate_points, x, y)
+            current, current_time = measure(decimate_points, np.round(x, 4), np.round(y, 4))
+            budget, budget_time = measure(decimate_points, np.round(x, 4), np.round(y, 4), 0, 100)
+
+            assert np.allclose(np.array(previous), np.array(current))
+
+            print('%-8d %-17s %8d %11.4fs %11.4fs %10d %9.4fs' % (
+                rows, name, len(x), previous_time, current_time, len(current[0]), budget_time))
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or [1000, 10000, 100000])
@@ -156,10 +156,14 @@ APP.add_url_rule('/tasks/<uuid:task_id>', 'cancel', tasks.cancel, methods=['DELE
 
 # Published Models
 APP.add_url_rule('/published', 'published-get', published.get)
+APP.add_url_rule('/published/cache', 'published-cache', published.cache)
 APP.add_url_rule('/published/<string:name>', 'published-add', published.add, methods=['POST'])
 APP.add_url_rule('/published/<string:name>', 'published-delete', published.delete, methods=['DELETE'])
 APP.add_url_rule('/published/<string:name>/rename', 'published-rename', published.rename, methods=['POST'])
 APP.add_url_rule('/published/<string:name>/test', 'published-test', published.test, methods=['POST'])
+APP.add_url_rule('/published/<string:name>/score', 'published-score', published.score, methods=['POST'])
+APP.add_url_rule('/published/<string:name>/scores', 'published-add-score', published.add_score, methods=['POST'])
+APP.add_url_rule('/published/<string:name>/scores/<uuid:scoreid>', 'published-export-score', published.export_score)
 APP.add_url_rule('/published/<string:name>/generalize', 'published-generalize', published.generalize, methods=['POST'])
 APP.add_url_rule('/published/<string:name>/export-model', 'published-export-model', published.export_model)
 APP.add_url_rule('/published/<string:name>/export-pmml', 'published-export-pmml', published.export_pmml)
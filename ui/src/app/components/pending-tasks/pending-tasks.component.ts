@@ -64,7 +64,7 @@ export class PendingTasksComponent implements OnInit, OnDestroy {
           });
         }
       }),
-      delay(60000),
+      delay(5000),
       repeat()
     ).subscribe();
   }
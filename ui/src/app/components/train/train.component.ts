@@ -45,6 +45,9 @@ export class TrainComponent implements OnDestroy, OnInit {
       searchers: this.formBuilder.array(this.pipelineProcessors.searchers, requireAtLeastOneCheckedValidator()),
       scorers: this.formBuilder.array(this.pipelineProcessors.scorers),
       shuffle: [true],
+      earlyStopping: [false],
+      timeBudget: [null],
+      fitBudget: [null],
       hyperParameters: {...this.defaultHyperParameters}
     });
 
@@ -63,6 +66,9 @@ export class TrainComponent implements OnDestroy, OnInit {
       this.setValues('searchers', this.parameters.ignore_searcher.split(','));
       this.setValues('scorers', this.parameters.ignore_scorer.split(','));
       this.trainForm.get('shuffle').setValue(!this.parameters.ignore_shuffle);
+      this.trainForm.get('earlyStopping').setValue(!!this.parameters.early_stopping);
+      this.trainForm.get('timeBudget').setValue(this.parameters.time_budget ? Number(this.parameters.time_budget) / 60 : null);
+      this.trainForm.get('fitBudget').setValue(this.parameters.fit_budget ? Number(this.parameters.fit_budget) : null);
 
       try {
         this.trainForm.get('hyperParameters').setValue(
@@ -72,9 +78,12 @@ export class TrainComponent implements OnDestroy, OnInit {
 
       this.trainForm.disable();
     } else {
+      /** Searchers which are opt-in are left unchecked unless saved options check them */
+      this.setValues('searchers', this.pipelineProcessors.searchers.filter(i => i.optIn).map(i => i.value));
+
       try {
         const options = JSON.parse(localStorage.getItem('training-options'));
-        this.trainForm.setValue(options);
+        this.trainForm.patchValue(options);
       } catch (err) {}
     }
 
@@ -113,6 +122,18 @@ export class TrainComponent implements OnDestroy, OnInit {
       formData.append('ignore_shuffle', 'true');
     }
 
+    if (this.trainForm.get('earlyStopping').value) {
+      formData.append('early_stopping', 'true');
+    }
+
+    if (this.trainForm.get('timeBudget').value > 0) {
+      formData.append('time_budget', String(this.trainForm.get('timeBudget').value * 60));
+    }
+
+    if (this.trainForm.get('fitBudget').value > 0) {
+      formData.append('fit_budget', String(Math.floor(this.trainForm.get('fitBudget').value)));
+    }
+
     (await this.api.startTraining(formData)).subscribe(
       (task: TaskAdded) => {
         this.allPipelines = task.pipelines;
@@ -88,13 +88,13 @@ export class UploadComponent implements OnInit, OnDestroy {
               message = 'Insufficient training data. Please verify at least 50 complete rows of data are present.';
               break;
             case 'training_rows_excess':
-              message = 'Excess rows in the training data. Please verify less than 10000 rows of data are present.';
+              message = 'Excess rows in the training data. Please verify the number of rows is within the limit of this server (10000 rows by default).';
               break;
             case 'training_features_excess':
-              message = 'Excess features in the training data. Please verify less than 2000 features are present.';
+              message = 'Excess features in the training data. Please verify the number of features is within the limit of this server (2000 features by default).';
               break;
             case 'test_rows_excess':
-              message = 'Excess rows in the generalization data. Please verify less than 100000 rows of data are present.';
+              message = 'Excess rows in the generalization data. Please verify the number of rows is within the limit of this server (100000 rows by default).';
               break;
           }
         }
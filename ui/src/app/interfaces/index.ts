@@ -1,6 +1,21 @@
 export interface Results {
     metadata: MetaData;
     results: GeneralizationResult[];
+    total: number;
+}
+
+export interface ResultsQuery {
+    page?: number;
+    page_size?: number;
+    sort?: string;
+    order?: 'asc' | 'desc';
+    estimator?: string;
+    scaler?: string;
+    feature_selector?: string;
+    searcher?: string;
+    scorer?: string;
+    columns?: string;
+    curves?: boolean;
 }
 
 export interface DataSets {
@@ -91,6 +106,9 @@ export interface SearchParameters {
     ignore_scorer: string;
     ignore_searcher: string;
     ignore_shuffle: boolean;
+    early_stopping: boolean;
+    time_budget?: string;
+    fit_budget?: string;
     hyper_parameters: string;
 }
 
@@ -112,8 +130,9 @@ export interface ActiveTaskStatus {
     parameters: SearchParameters;
 }
 export interface ScheduledTaskStatus {
-    eta: string;
-    state: 'PENDING';
+    id: string;
+    eta: string | null;
+    state: 'PENDING' | 'REVOKED';
     jobid: string;
     label: string;
     parameters: SearchParameters;
@@ -15,6 +15,7 @@ import {
   PublishedModels,
   TestReply,
   Results,
+  ResultsQuery,
   RefitGeneralization
 } from '../../interfaces';
 import { environment } from '../../../environments/environment';
@@ -122,10 +123,15 @@ export class MiloApiService {
     return this.request('delete', `/tasks/${id}`);
   }
 
-  getResults() {
+  getResults(query?: ResultsQuery) {
+    const params = Object.keys(query || {})
+      .filter(key => query[key] !== undefined)
+      .map(key => `${key}=${encodeURIComponent(query[key])}`)
+      .join('&');
+
     return this.request<Results>(
       'get',
-      `/jobs/${this.currentJobId}/result`
+      `/jobs/${this.currentJobId}/result` + (params ? '?' + params : '')
     );
   }
 
@@ -4,14 +4,24 @@ Celery worker for machine learning jobs
 
 import os
 import json
+import time
 
-from celery import Celery
-from celery.signals import worker_process_init
+from celery import Celery, chain, chord, group
+from celery.signals import task_failure, task_postrun, task_prerun, task_revoked, worker_process_init
+from celery.worker.state import revoked
 
-from ml import search
+from ml import scoring, search, task_store
+from ml.cost_model import remaining_time
 
 BROKER_URL = os.getenv('BROKER_URL', 'pyamqp://guest@127.0.0.1//')
-CELERY = Celery(__name__, backend='rpc://', broker=BROKER_URL)
+
+# Define the result backend, fanning jobs out requires one supporting chords (eg. Redis)
+RESULT_BACKEND = os.getenv('RESULT_BACKEND', 'rpc://')
+
+# Define whether the pipelines of a job are run as subtasks spread across the workers
+PIPELINE_TASKS = os.getenv('PIPELINE_TASKS', '') != ''
+
+CELERY = Celery(__name__, backend=RESULT_BACKEND, broker=BROKER_URL)
 CELERY.conf.update(task_track_started=True)
 
 def fix_celery_solo(userid, jobid):
@@ -33,7 +43,8 @@ def fix_celery_solo(userid, jobid):
 
     return False
 
-@CELERY.task(bind=True)
+# Jobs killed with their worker are redelivered, and resume from their last completed pipeline
+@CELERY.task(bind=True, acks_late=True, reject_on_worker_lost=True)
 def queue_training(self, userid, jobid, label_column, parameters):
     if fix_celery_solo(userid, jobid):
         return 0
@@ -52,6 +63,34 @@ def queue_training(self, userid, jobid, label_column, parameters):
     with open(job_folder + '/metadata.json', 'w') as metafile:
         json.dump(metadata, metafile)
 
+    if PIPELINE_TASKS:
+        # Import the data once, run every pipeline as a subtask and report them once all have run.
+        # Pipelines building upon another pipeline are chained after it, the longest chains are queued first.
+        size = search.stage_job(dataset_folder + '/train.csv', dataset_folder + '/test.csv', label_column, job_folder)
+        slots = cluster_slots()
+        pipelines, dependencies, costs = search.plan_job(parameters, job_folder, size, slots)
+
+        # The chains start from the pipelines without a dependency, a downgraded plan may
+        # place a pipeline after the one depending on it.
+        chains = {index: [index] for index in range(len(pipelines)) if index not in dependencies}
+        for index in sorted(dependencies):
+            root = dependencies[index]
+            while root in dependencies:
+                root = dependencies[root]
+            chains[root].append(index)
+
+        if None not in costs:
+            chains = dict(sorted(chains.items(), key=lambda item: -sum(costs[index] for index in item[1])))
+
+        update_progress(self, self.request.id, 0, len(pipelines), remaining_time(costs, slots))
+        return self.replace(chord(
+            group(chain(*[
+                queue_pipeline.si(userid, jobid, label_column, parameters, self.request.id, index)
+                for index in indices
+            ]) for indices in chains.values()),
+            queue_report.si(userid, jobid, label_column, parameters)
+        ))
+
     search.find_best_model(
         dataset_folder + '/train.csv',
         dataset_folder + '/test.csv',
@@ -59,12 +98,138 @@ def queue_training(self, userid, jobid, label_column, parameters):
         label_column,
         parameters,
         job_folder,
-        lambda x, y: self.update_state(state='PROGRESS', meta={'current': x, 'total': y})
+        lambda x, y, eta=None: update_progress(self, self.request.id, x, y, eta)
+    )
+    return {}
+
+@CELERY.task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def queue_pipeline(self, userid, jobid, label_column, parameters, taskid, index):
+    """Run a single pipeline of a job, reporting the progress of the whole job on its task"""
+
+    # Cancelling the job revokes its task, its remaining pipelines are skipped. The revoked tasks of
+    # this worker process miss those revoked elsewhere, the task store is shared by every worker.
+    if taskid in revoked or task_store.is_revoked(taskid):
+        return 0
+
+    job_folder = 'data/users/' + userid + '/jobs/' + jobid
+    fits = search.run_staged_pipeline(
+        index, ['No ' + label_column, label_column], label_column, parameters, job_folder)
+
+    plan = search.load_plan(job_folder)
+    completed = [name for name in os.listdir(job_folder + '/pipelines') if name.endswith('.joblib')]
+    update_progress(self, taskid, len(completed), len(plan['pipelines']), remaining_time(
+        [cost for index, cost in enumerate(plan['costs']) if str(index) + '.joblib' not in completed],
+        plan['slots']
+    ))
+    return fits
+
+@CELERY.task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def queue_report(self, userid, jobid, label_column, parameters):
+    """Report a job once all of its pipelines have run, this task replaces the job's task"""
+
+    job_folder = 'data/users/' + userid + '/jobs/' + jobid
+    with open(job_folder + '/metadata.json') as metafile:
+        dataset_folder = 'data/users/' + userid + '/datasets/' + json.load(metafile)['datasetid']
+
+    search.find_best_model(
+        dataset_folder + '/train.csv',
+        dataset_folder + '/test.csv',
+        ['No ' + label_column, label_column],
+        label_column,
+        parameters,
+        job_folder,
+        lambda x, y, eta=None: update_progress(self, self.request.id, x, y, eta),
+        staged=True
+    )
+    return {}
+
+@CELERY.task(bind=True)
+def queue_scoring(self, userid, scoreid, input_path, model_path, threshold, features, output_format):
+    if fix_celery_solo(userid, 'scores/' + scoreid):
+        return 0
+
+    score_folder = 'data/users/' + userid + '/scores/' + scoreid
+
+    scoring.score_file(
+        input_path,
+        model_path,
+        score_folder + '/output.' + output_format,
+        threshold,
+        features,
+        output_format,
+        update_function=lambda x, y: self.update_state(state='PROGRESS', meta={'current': x, 'total': y})
     )
+
+    with open(score_folder + '/metadata.json') as metafile:
+        metadata = json.load(metafile)
+
+    metadata['date'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+    with open(score_folder + '/metadata.json', 'w') as metafile:
+        json.dump(metadata, metafile)
+
     return {}
 
+def update_progress(task, task_id, current, total, eta=None):
+    """Report the progress of a job on its task and in the task store"""
+
+    task.update_state(task_id=task_id, state='PROGRESS', meta={'current': current, 'total': total, 'eta': eta})
+    task_store.task_progress(task_id, current, total, eta)
+
+def job_task_id(task, task_id, args):
+    """ID of the job a training task runs for (the pipelines of a job report on its task), None for other tasks"""
+
+    if task.name.endswith('.queue_pipeline'):
+        return args[4]
+
+    if task.name.endswith('.queue_training') or task.name.endswith('.queue_report'):
+        return task_id
+
+    return None
+
+@task_prerun.connect
+def record_started(task_id=None, task=None, args=None, **_):
+    """Record a job as started as soon as any of its tasks starts"""
+
+    job_id = job_task_id(task, task_id, args)
+    if job_id is not None:
+        task_store.task_started(job_id)
+
+@task_postrun.connect
+def record_finished(task_id=None, task=None, args=None, state=None, **_):
+    """Record a job as finished once its task (or the task reporting it) succeeds"""
+
+    # A fanned out job replaces its task (ignored) and its pipelines do not finish it
+    if state == 'SUCCESS' and not task.name.endswith('.queue_pipeline'):
+        job_id = job_task_id(task, task_id, args)
+        if job_id is not None:
+            task_store.task_finished(job_id)
+
+@task_failure.connect
+def record_failure(task_id=None, exception=None, args=None, sender=None, **_):
+    """Record a job as failed when any of its tasks fails"""
+
+    job_id = job_task_id(sender, task_id, args)
+    if job_id is not None:
+        task_store.task_finished(job_id, 'FAILURE', str(exception))
+
+@task_revoked.connect
+def record_revoked(request=None, sender=None, **_):
+    """Record a job as finished once the worker stops (or discards) its revoked task"""
+
+    job_id = job_task_id(sender, request.id, request.args)
+    if job_id is not None:
+        task_store.task_finished(job_id, 'REVOKED')
+
+def cluster_slots():
+    """Number of tasks the workers run concurrently (1 when no worker replies)"""
+
+    stats = CELERY.control.inspect(timeout=1).stats() or {}
+    return max(1, sum(worker['pool'].get('max-concurrency', 1) for worker in stats.values()))
+
 def revoke_task(task_id):
     CELERY.control.revoke(task_id, terminate=True)
+    task_store.task_revoked(task_id)
 
 def get_task_status(task_id):
     """Gets a given's task and returns a summary in JSON format"""
@@ -83,6 +248,7 @@ def get_task_status(task_id):
             response.update({
                 'current': task.info.get('current', 0),
                 'total': task.info.get('total', 1),
+                'eta': task.info.get('eta'),
                 'status': task.info.get('status', '')
             })
     else: